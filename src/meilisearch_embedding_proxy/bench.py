@@ -0,0 +1,413 @@
+"""
+基准测试模块
+启动本地假 OpenAI 兼容上游和代理服务，回放采样流量或合成的 Meilisearch 负载，
+统计吞吐、延迟分位数与上游调用次数
+"""
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .capture import load_capture
+
+# 合成文本使用的词表，模拟 Meilisearch documentTemplate 渲染出的中英文混合内容
+_WORDS = [
+    "meilisearch", "embedding", "vector", "search", "index", "document", "proxy",
+    "hybrid", "semantic", "keyword", "ranking", "filter", "facet", "typo",
+    "搜索", "向量", "文档", "索引", "语义", "相似度", "查询", "模型", "嵌入", "服务",
+]
+
+
+def create_fake_upstream(latency_ms: float = 50.0, per_item_ms: float = 0.5, jitter_ms: float = 10.0):
+    """
+    创建假的 OpenAI 兼容嵌入服务，按配置的延迟返回固定向量并统计调用次数。
+    假上游与压测客户端在同一进程中运行，响应中的向量部分按 (维度, 条数) 预先编码缓存，
+    避免每次响应的 JSON 序列化占用 CPU，使代理看到的延迟接近配置值
+    """
+    from fastapi import FastAPI, Request, Response
+
+    fake_app = FastAPI(title="Fake OpenAI Embedding Upstream")
+    stats = {"calls": 0, "items": 0, "chars": 0}
+    encoded: Dict[Tuple[int, int], bytes] = {}
+    fake_app.state.stats = stats
+
+    def encode_data(dimensions: int, count: int) -> bytes:
+        key = (dimensions, count)
+        if key not in encoded:
+            vector = [round((i % 97) / 97, 6) for i in range(dimensions)]
+            encoded[key] = json.dumps([
+                {"object": "embedding", "index": i, "embedding": vector}
+                for i in range(count)
+            ], separators=(",", ":")).encode()
+        return encoded[key]
+
+    @fake_app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        inputs = body.get("input") or []
+        if isinstance(inputs, str):
+            inputs = [inputs]
+        dimensions = int(body.get("dimensions") or 1024)
+
+        stats["calls"] += 1
+        stats["items"] += len(inputs)
+        stats["chars"] += sum(len(item) for item in inputs)
+
+        delay_ms = latency_ms + per_item_ms * len(inputs) + random.uniform(0, jitter_ms)
+        await asyncio.sleep(delay_ms / 1000)
+
+        tokens = sum(max(1, len(item) // 2) for item in inputs)
+        tail = json.dumps({
+            "model": body.get("model", "fake-embedding"),
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }, separators=(",", ":")).encode()
+        content = b'{"object":"list","data":' + encode_data(dimensions, len(inputs)) + b"," + tail[1:]
+        return Response(content=content, media_type="application/json")
+
+    @fake_app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "fake-embedding", "object": "model"}]}
+
+    @fake_app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return fake_app
+
+
+class _ServerThread:
+    """在后台线程中运行 uvicorn 服务"""
+
+    def __init__(self, app, host: str, port: int):
+        import uvicorn
+
+        self.server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self, timeout: float = 10.0) -> None:
+        self.thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive():
+                raise RuntimeError("假上游服务启动失败")
+            time.sleep(0.05)
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=5)
+
+
+def _free_port() -> int:
+    """获取一个本地空闲端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _spawn_proxy(port: int, upstream_url: str, dimensions: int, normalize: bool = False) -> subprocess.Popen:
+    """以子进程方式启动代理服务，上游指向假服务"""
+    env = dict(os.environ)
+    env.update({
+        "BASE_URL": upstream_url,
+        "API_KEY": "bench",
+        "EMBEDDING_DIMENSIONS": str(dimensions),
+        "LOG_LEVEL": "WARNING",
+        "CAPTURE_FILE": "",
+        "NORMALIZE_ENABLED": "true" if normalize else "false",
+    })
+    return subprocess.Popen(
+        [
+            sys.executable, "-m", "meilisearch_embedding_proxy.cli",
+            "--host", "127.0.0.1",
+            "--port", str(port),
+            "--log-level", "warning",
+        ],
+        env=env,
+    )
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> None:
+    """轮询代理根路径直到服务可用"""
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"代理服务进程已退出，返回码 {proc.returncode}")
+        try:
+            if httpx.get(f"{url}/", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError("等待代理服务启动超时")
+
+
+def synthetic_workload(num_requests: int, batch_size: int = 20, query_ratio: float = 0.3,
+                       seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    生成类似 Meilisearch 的合成负载：
+    索引时按批发送渲染后的文档（长度呈对数正态分布），搜索时发送单条短查询
+    """
+    rng = random.Random(seed)
+    entries = []
+    for _ in range(num_requests):
+        if rng.random() < query_ratio:
+            lengths = [rng.randint(4, 40)]
+        else:
+            lengths = [min(8000, max(16, int(rng.lognormvariate(6.0, 0.8)))) for _ in range(batch_size)]
+        entries.append({"batch_size": len(lengths), "lengths": lengths})
+    return entries
+
+
+def _build_corpus(rng: random.Random, size: int = 65536, noisy: bool = False) -> str:
+    """
+    构建用于切片生成文本的语料；noisy 为 True 时混入 HTML 片段、实体、
+    零宽字符、全角字符、多余空白和重复的样板行，模拟未清洗的文档
+    """
+    parts = []
+    total = 0
+    while total < size:
+        title = " ".join(rng.choice(_WORDS) for _ in range(4))
+        content = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(20, 60)))
+        if noisy:
+            content = content.replace(" ", rng.choice([" ", "  ", " \u200b", "&nbsp;", "\u3000"]))
+            part = (
+                f"<div class=\"doc\"><h1>{title}</h1>\n\n"
+                f"<p>{content}</p>   \n"
+                f"{'-' * rng.randint(5, 40)}\n"
+                "查看更多 &gt;&gt;\n查看更多 &gt;&gt;\n"
+                f"ＩＤ：{rng.randint(1, 99999)}</div>\n"
+            )
+        else:
+            part = f"title: {title}\ncontent: {content}\n"
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)
+
+
+def build_payloads(entries: List[Dict[str, Any]], seed: int = 0,
+                   noisy: bool = False) -> List[Tuple[float, List[str]]]:
+    """将负载记录转换为 (相对到达时间, 输入文本列表)，没有原文的记录按长度合成文本"""
+    rng = random.Random(seed)
+    corpus = _build_corpus(rng, noisy=noisy)
+    start_ts = entries[0].get("ts", 0.0) if entries else 0.0
+
+    payloads = []
+    for entry in entries:
+        texts = entry.get("input")
+        if not texts:
+            texts = []
+            for length in entry["lengths"]:
+                length = min(length, len(corpus))
+                offset = rng.randint(0, len(corpus) - length)
+                texts.append(corpus[offset:offset + length])
+        payloads.append((max(0.0, entry.get("ts", start_ts) - start_ts), texts))
+    return payloads
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩法计算分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+async def _drive(proxy_url: str, payloads: List[Tuple[float, List[str]]], concurrency: int,
+                 speed: float, timeout: float) -> Dict[str, Any]:
+    """按并发度发送请求；speed > 0 时按采样到达时间（除以 speed）开环发送"""
+    import httpx
+
+    latencies: List[float] = []
+    errors = 0
+    items = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=proxy_url, timeout=timeout, limits=limits) as client:
+        start = time.perf_counter()
+
+        async def send(offset: float, texts: List[str]) -> None:
+            nonlocal errors, items
+            if speed > 0:
+                delay = start + offset / speed - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            async with semaphore:
+                t0 = time.perf_counter()
+                try:
+                    response = await client.post("/v1/embeddings", json={"input": texts})
+                    ok = response.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                latencies.append((time.perf_counter() - t0) * 1000)
+                if ok:
+                    items += len(texts)
+                else:
+                    errors += 1
+
+        await asyncio.gather(*(send(offset, texts) for offset, texts in payloads))
+        duration = time.perf_counter() - start
+
+    return {"latencies": latencies, "errors": errors, "items": items, "duration": duration}
+
+
+def summarize(result: Dict[str, Any], upstream: Dict[str, Any]) -> Dict[str, Any]:
+    """汇总压测结果"""
+    latencies = result["latencies"]
+    duration = result["duration"] or 1e-9
+    requests_sent = len(latencies)
+    return {
+        "requests": requests_sent,
+        "errors": result["errors"],
+        "items": result["items"],
+        "duration_s": round(duration, 3),
+        "throughput_rps": round(requests_sent / duration, 2),
+        "items_per_s": round(result["items"] / duration, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 2),
+            "p95": round(percentile(latencies, 95), 2),
+            "p99": round(percentile(latencies, 99), 2),
+            "max": round(max(latencies), 2) if latencies else 0.0,
+        },
+        "upstream": {
+            "calls": upstream.get("calls", 0),
+            "items": upstream.get("items", 0),
+            "chars": upstream.get("chars", 0),
+        },
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """将压测结果格式化为可读文本"""
+    latency = report["latency_ms"]
+    upstream = report["upstream"]
+    return "\n".join([
+        f"请求数: {report['requests']} (失败 {report['errors']})",
+        f"文本条数: {report['items']}",
+        f"耗时: {report['duration_s']}s",
+        f"吞吐: {report['throughput_rps']} req/s, {report['items_per_s']} items/s",
+        f"延迟(ms): p50={latency['p50']} p95={latency['p95']} p99={latency['p99']} max={latency['max']}",
+        f"上游调用: {upstream['calls']} 次, {upstream['items']} 条, {upstream['chars']} 字符",
+    ])
+
+
+def run_benchmark(capture: Optional[str] = None, num_requests: int = 500, concurrency: int = 16,
+                  batch_size: int = 20, query_ratio: float = 0.3, upstream_latency_ms: float = 50.0,
+                  upstream_per_item_ms: float = 0.5, upstream_jitter_ms: float = 10.0,
+                  dimensions: int = 1024, speed: float = 0.0, seed: int = 0,
+                  timeout: float = 60.0, normalize: bool = False, noisy: bool = False) -> Dict[str, Any]:
+    """
+    运行一次完整的离线压测：
+    启动假上游和代理子进程，回放采样文件（或合成负载），返回汇总结果
+    """
+    import httpx
+
+    if concurrency <= 0:
+        raise ValueError(f"并发度必须大于 0: {concurrency}")
+
+    if capture:
+        entries = load_capture(capture)
+        if num_requests:
+            entries = entries[:num_requests]
+        logger.info(f"回放采样文件 {capture}，共 {len(entries)} 个请求")
+    else:
+        entries = synthetic_workload(num_requests, batch_size, query_ratio, seed)
+        logger.info(f"使用合成负载，共 {len(entries)} 个请求")
+
+    if not entries:
+        raise ValueError("没有可回放的请求")
+
+    payloads = build_payloads(entries, seed, noisy)
+
+    upstream_port = _free_port()
+    upstream = _ServerThread(
+        create_fake_upstream(upstream_latency_ms, upstream_per_item_ms, upstream_jitter_ms),
+        "127.0.0.1",
+        upstream_port,
+    )
+    upstream.start()
+    upstream_url = f"http://127.0.0.1:{upstream_port}"
+
+    proxy_port = _free_port()
+    proxy_url = f"http://127.0.0.1:{proxy_port}"
+    proc = _spawn_proxy(proxy_port, f"{upstream_url}/v1", dimensions, normalize)
+    try:
+        _wait_ready(proxy_url, proc)
+        logger.info(f"代理服务已就绪: {proxy_url}，并发度 {concurrency}")
+        result = asyncio.run(_drive(proxy_url, payloads, concurrency, speed, timeout))
+        upstream_stats = httpx.get(f"{upstream_url}/stats", timeout=5.0).json()
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+        upstream.stop()
+
+    return summarize(result, upstream_stats)
+
+
+def write_report(report: Dict[str, Any], path: str) -> None:
+    """将压测结果写入 JSON 文件"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def run_normalize_benchmark(num_batches: int = 200, batch_size: int = 20, seed: int = 0,
+                            max_repeat: int = 3) -> Dict[str, Any]:
+    """
+    在进程内测量归一化流水线的耗时：使用带噪声的合成索引批次，
+    统计每批与每条文本的耗时分位数以及移除的字符比例
+    """
+    from .normalize import TextNormalizer
+
+    entries = synthetic_workload(num_batches, batch_size, query_ratio=0.0, seed=seed)
+    payloads = build_payloads(entries, seed, noisy=True)
+    normalizer = TextNormalizer(max_repeat=max_repeat)
+
+    batch_latencies: List[float] = []
+    start = time.perf_counter()
+    for _, texts in payloads:
+        t0 = time.perf_counter()
+        normalizer.normalize_batch(texts)
+        batch_latencies.append((time.perf_counter() - t0) * 1000)
+    duration = time.perf_counter() - start
+
+    stats = normalizer.stats()
+    return {
+        "batches": len(payloads),
+        "texts": stats["texts"],
+        "duration_s": round(duration, 4),
+        "texts_per_s": round(stats["texts"] / duration, 2) if duration else 0.0,
+        "us_per_text": round(duration * 1e6 / stats["texts"], 2) if stats["texts"] else 0.0,
+        "batch_latency_ms": {
+            "p50": round(percentile(batch_latencies, 50), 3),
+            "p99": round(percentile(batch_latencies, 99), 3),
+        },
+        "chars_in": stats["chars_in"],
+        "chars_removed": stats["chars_removed"],
+        "removed_ratio": stats["removed_ratio"],
+    }
+
+
+def format_normalize_report(report: Dict[str, Any]) -> str:
+    """将归一化基准结果格式化为可读文本"""
+    latency = report["batch_latency_ms"]
+    return "\n".join([
+        f"批次数: {report['batches']}, 文本条数: {report['texts']}",
+        f"耗时: {report['duration_s']}s, {report['texts_per_s']} texts/s, {report['us_per_text']} us/text",
+        f"每批耗时(ms): p50={latency['p50']} p99={latency['p99']}",
+        f"移除字符: {report['chars_removed']}/{report['chars_in']} ({report['removed_ratio'] * 100:.1f}%)",
+    ])
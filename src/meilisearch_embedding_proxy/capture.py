@@ -0,0 +1,87 @@
+"""
+流量采样模块，按比例记录 /v1/embeddings 请求到 JSONL 文件，供 bench 回放
+"""
+import json
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+
+class TrafficRecorder:
+    """按采样率将嵌入请求写入 JSONL 文件，每行一个请求"""
+
+    def __init__(self, path: str, sample_rate: float = 1.0, include_text: bool = False):
+        self.path = path
+        self.sample_rate = max(0.0, min(1.0, sample_rate))
+        self.include_text = include_text
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        logger.info(f"流量采样已开启: {path} (采样率 {self.sample_rate}, 记录文本: {include_text})")
+
+    def should_sample(self) -> bool:
+        """判断本次请求是否需要采样"""
+        return self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
+    def record(self, inputs: List[str]) -> None:
+        """记录一次请求的到达时间、批大小与每条输入的长度"""
+        if not self.should_sample():
+            return
+
+        entry: Dict[str, Any] = {
+            "ts": time.time(),
+            "batch_size": len(inputs),
+            "lengths": [len(item) for item in inputs],
+        }
+        if self.include_text:
+            entry["input"] = inputs
+
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        try:
+            with self._lock:
+                self._file.write(line)
+                self._file.flush()
+        except Exception as e:
+            logger.warning(f"写入流量采样失败: {str(e)}")
+
+    def close(self) -> None:
+        """关闭采样文件"""
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+
+def load_capture(path: str) -> List[Dict[str, Any]]:
+    """读取采样文件，按到达时间排序返回所有请求记录"""
+    entries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logger.warning(f"跳过无法解析的采样行 {line_no}")
+                continue
+            if "lengths" not in entry and "input" in entry:
+                entry["lengths"] = [len(item) for item in entry["input"]]
+            if not entry.get("lengths"):
+                continue
+            entries.append(entry)
+
+    entries.sort(key=lambda e: e.get("ts", 0.0))
+    return entries
+
+
+def create_recorder(path: Optional[str], sample_rate: float, include_text: bool) -> Optional[TrafficRecorder]:
+    """根据配置创建采样器，未配置文件路径时返回 None"""
+    if not path:
+        return None
+    try:
+        return TrafficRecorder(path, sample_rate, include_text)
+    except OSError as e:
+        logger.error(f"无法打开流量采样文件 {path}: {str(e)}")
+        return None
@@ -7,10 +7,9 @@ meilisearch 命令行工具
 import argparse
 import sys
 import os
-import uvicorn
 from pathlib import Path
 from loguru import logger
-from .config import config
+from .config import get_config, setup_logging
 
 
 def get_version():
@@ -20,18 +19,16 @@ def get_version():
 
 def start_server(host=None, port=None, reload=False, log_level=None):
     """启动 SiliconFlow 嵌入代理服务"""
+    import uvicorn
+
+    config = get_config()
     # 使用配置文件中的默认值
     host = host or config.host
     port = port or config.port
     log_level = log_level or config.log_level.lower()
     
     # 配置loguru日志
-    logger.remove()
-    logger.add(
-        sys.stdout,
-        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-        level=log_level.upper()
-    )
+    setup_logging(log_level)
     
     logger.info(f"启动 SiliconFlow 嵌入代理服务...")
     logger.info(f"服务地址: http://{host}:{port}")
@@ -52,14 +49,26 @@ def start_server(host=None, port=None, reload=False, log_level=None):
         sys.exit(1)
     
     try:
-        # 启动 FastAPI 服务
-        uvicorn.run(
-            "meilisearch_embedding_proxy.fastapi_server:app",
-            host=host,
-            port=port,
-            reload=reload,
-            log_level=log_level
-        )
+        # 启动 FastAPI 服务；自动重载模式下 uvicorn 需要通过导入路径在子进程中调用工厂函数，
+        # 否则直接传入应用实例，避免按导入字符串重复加载模块
+        if reload:
+            uvicorn.run(
+                "meilisearch_embedding_proxy.fastapi_server:create_app",
+                factory=True,
+                host=host,
+                port=port,
+                reload=True,
+                log_level=log_level
+            )
+        else:
+            from .fastapi_server import create_app
+
+            uvicorn.run(
+                create_app(configure_logging=False),
+                host=host,
+                port=port,
+                log_level=log_level
+            )
     except KeyboardInterrupt:
         logger.info("服务已停止")
     except Exception as e:
@@ -67,8 +76,121 @@ def start_server(host=None, port=None, reload=False, log_level=None):
         sys.exit(1)
 
 
+def run_bench(args):
+    """运行离线基准测试"""
+    from .bench import (
+        format_normalize_report,
+        format_report,
+        run_benchmark,
+        run_normalize_benchmark,
+        write_report,
+    )
+
+    if args.normalize_only:
+        report = run_normalize_benchmark(
+            num_batches=args.requests,
+            batch_size=args.batch_size,
+            seed=args.seed
+        )
+        print(format_normalize_report(report))
+        if args.output:
+            write_report(report, args.output)
+        return
+
+    try:
+        report = run_benchmark(
+            capture=args.capture,
+            num_requests=args.requests,
+            concurrency=args.concurrency,
+            batch_size=args.batch_size,
+            query_ratio=args.query_ratio,
+            upstream_latency_ms=args.upstream_latency_ms,
+            upstream_per_item_ms=args.upstream_per_item_ms,
+            upstream_jitter_ms=args.upstream_jitter_ms,
+            dimensions=args.dimensions,
+            speed=args.speed,
+            seed=args.seed,
+            normalize=args.normalize,
+            noisy=args.noisy,
+        )
+    except Exception as e:
+        logger.error(f"基准测试失败: {e}")
+        sys.exit(1)
+
+    print(format_report(report))
+    if args.output:
+        write_report(report, args.output)
+        logger.info(f"结果已写入: {args.output}")
+
+
+def positive_int(value: str) -> int:
+    """argparse 类型：正整数"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的整数: '{value}'")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"必须大于 0: {number}")
+    return number
+
+
+def get_meilisearch_client():
+    """根据配置创建 Meilisearch 客户端"""
+    import meilisearch
+
+    config = get_config()
+    config.validate_meilisearch()
+    return meilisearch.Client(config.meilisearch_url, config.meilisearch_api_key)
+
+
+def run_export_vectors(args):
+    """导出索引向量到本地目录"""
+    from .vectors import export_vectors
+
+    try:
+        result = export_vectors(
+            get_meilisearch_client(),
+            args.index,
+            args.embedder,
+            args.output,
+            batch_size=args.batch_size
+        )
+    except Exception as e:
+        logger.error(f"导出向量失败: {e}")
+        sys.exit(1)
+
+    logger.info(f"导出完成: {result['documents']} 个文档, {result['count']} 个向量 -> {args.output}")
+
+
+def run_import_vectors(args):
+    """从本地目录导入向量到索引"""
+    from .vectors import import_vectors
+
+    try:
+        result = import_vectors(
+            get_meilisearch_client(),
+            args.index,
+            args.input,
+            embedder_name=args.embedder,
+            batch_size=args.batch_size,
+            wait=args.wait
+        )
+    except Exception as e:
+        logger.error(f"导入向量失败: {e}")
+        sys.exit(1)
+
+    if result.get("status") == "failed":
+        logger.error(f"导入失败: {len(result['failed_tasks'])}/{len(result['task_uids'])} 个任务未成功")
+        for task in result["failed_tasks"]:
+            logger.error(f"任务 {task['uid']} ({task['status']}): {task['error']}")
+        sys.exit(1)
+
+    logger.info(f"导入完成: {result['documents']} 个文档, {len(result['task_uids'])} 个任务")
+
+
 def main():
     """主命令行入口"""
+    config = get_config()
     parser = argparse.ArgumentParser(
         description="Meilisearch Embedding Proxy - SiliconFlow 嵌入代理服务命令行工具",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -79,6 +201,10 @@ def main():
   meilisearch-embedding-proxy --host localhost  # 仅本地访问
   meilisearch-embedding-proxy --reload          # 开发模式，自动重载
   meilisearch-embedding-proxy --help            # 显示帮助信息
+  meilisearch-embedding-proxy bench             # 使用合成负载运行离线基准测试
+  meilisearch-embedding-proxy bench --capture capture.jsonl  # 回放采样流量
+  meilisearch-embedding-proxy export-vectors movies default ./movies-vectors  # 导出向量
+  meilisearch-embedding-proxy import-vectors movies_v2 ./movies-vectors --wait # 导入向量
 
 环境变量配置:
   API_KEY         - SiliconFlow API密钥 (必需)
@@ -89,6 +215,14 @@ def main():
   HOST            - 服务器主机 (默认: 0.0.0.0)
   PORT            - 服务器端口 (默认: 8000)
   LOG_LEVEL       - 日志级别 (默认: INFO)
+  CAPTURE_FILE    - 流量采样文件路径 (默认: 不采样)
+  CAPTURE_SAMPLE_RATE - 采样率 0~1 (默认: 1.0)
+  CAPTURE_TEXT    - 是否记录原始文本 (默认: false)
+  MAX_CONNECTIONS - 上游连接池大小 (默认: 100)
+  WARMUP_CONNECTIONS - 启动时预热的上游连接数 (默认: 4)
+  KEEPALIVE_EXPIRY - 上游空闲连接保留秒数 (默认: 300)
+  NORMALIZE_ENABLED - 是否在截断前归一化输入文本 (默认: false)
+  CONFIG_WATCH_INTERVAL - 检查 .env 变化并热重载的间隔秒数 (默认: 0, 关闭)
         """
     )
     
@@ -121,8 +255,60 @@ def main():
         version=f"meilisearch-embedding-proxy {get_version()}"
     )
     
+    subparsers = parser.add_subparsers(dest="command")
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="回放采样流量或合成负载，对接本地假上游进行基准测试"
+    )
+    bench_parser.add_argument("--capture", help="CAPTURE_FILE 采样文件路径 (默认: 使用合成负载)")
+    bench_parser.add_argument("--requests", type=positive_int, default=500, help="请求数量，回放时为最大数量 (默认: 500)")
+    bench_parser.add_argument("--concurrency", type=positive_int, default=16, help="并发度 (默认: 16)")
+    bench_parser.add_argument("--batch-size", type=int, default=20, help="合成负载中索引批次大小 (默认: 20)")
+    bench_parser.add_argument("--query-ratio", type=float, default=0.3, help="合成负载中查询请求占比 (默认: 0.3)")
+    bench_parser.add_argument("--upstream-latency-ms", type=float, default=50.0, help="假上游基础延迟 (默认: 50)")
+    bench_parser.add_argument("--upstream-per-item-ms", type=float, default=0.5, help="假上游每条文本额外延迟 (默认: 0.5)")
+    bench_parser.add_argument("--upstream-jitter-ms", type=float, default=10.0, help="假上游随机抖动 (默认: 10)")
+    bench_parser.add_argument("--dimensions", type=int, default=1024, help="向量维度 (默认: 1024)")
+    bench_parser.add_argument("--speed", type=float, default=0.0,
+                              help="按采样到达时间回放的倍速，0 表示尽快发送 (默认: 0)")
+    bench_parser.add_argument("--seed", type=int, default=0, help="随机种子 (默认: 0)")
+    bench_parser.add_argument("--normalize", action="store_true", help="代理开启输入归一化 (NORMALIZE_ENABLED)")
+    bench_parser.add_argument("--noisy", action="store_true", help="合成文本中混入 HTML、零宽字符和重复样板")
+    bench_parser.add_argument("--normalize-only", action="store_true",
+                              help="仅在进程内测量归一化流水线耗时，不启动服务")
+    bench_parser.add_argument("--output", help="将结果写入 JSON 文件")
+
+    export_parser = subparsers.add_parser(
+        "export-vectors",
+        help="导出索引中某个 embedder 的全部向量到本地目录"
+    )
+    export_parser.add_argument("index", help="源索引 ID")
+    export_parser.add_argument("embedder", help="embedder 名称")
+    export_parser.add_argument("output", help="输出目录")
+    export_parser.add_argument("--batch-size", type=positive_int, default=1000, help="每批读取的文档数 (默认: 1000)")
+
+    import_parser = subparsers.add_parser(
+        "import-vectors",
+        help="将导出的向量作为用户提供的向量导入目标索引，无需重新嵌入"
+    )
+    import_parser.add_argument("index", help="目标索引 ID")
+    import_parser.add_argument("input", help="export-vectors 的输出目录")
+    import_parser.add_argument("--embedder", help="目标 embedder 名称 (默认: 与导出时相同)")
+    import_parser.add_argument("--batch-size", type=positive_int, default=1000, help="每批写入的文档数 (默认: 1000)")
+    import_parser.add_argument("--wait", action="store_true", help="等待最后一个导入任务完成")
+
     args = parser.parse_args()
-    
+
+    if args.command == "bench":
+        run_bench(args)
+        return
+    if args.command == "export-vectors":
+        run_export_vectors(args)
+        return
+    if args.command == "import-vectors":
+        run_import_vectors(args)
+        return
+
     # 启动服务
     start_server(
         host=args.host,
@@ -2,50 +2,87 @@
 配置模块，用于读取环境变量配置
 """
 import os
-from typing import Optional
-from dotenv import load_dotenv
+import sys
+import threading
+from typing import Dict, List, Mapping, Optional, Set, Tuple
 
-# 加载环境变量
-load_dotenv()
+# loguru 内置的日志级别
+LOG_LEVELS = {"TRACE", "DEBUG", "INFO", "SUCCESS", "WARNING", "ERROR", "CRITICAL"}
 
 class Config:
     """配置类，包含所有必要的配置项"""
     
-    def __init__(self):
+    def __init__(self, environ: Optional[Mapping[str, str]] = None):
+        # 默认读取进程环境变量；重新加载时传入合并后的值，验证通过前不修改进程环境
+        env = os.environ if environ is None else environ
         # 最大token限制
-        self.max_token_limit: int = int(os.getenv("MAX_TOKEN_LIMIT", "10000"))
+        self.max_token_limit: int = int(env.get("MAX_TOKEN_LIMIT", "10000"))
         
         # 模型名称
-        self.model_name: str = os.getenv("MODEL_NAME", "BAAI/bge-large-zh-v1.5")
+        self.model_name: str = env.get("MODEL_NAME", "BAAI/bge-large-zh-v1.5")
         
         # API基础URL
-        self.base_url: str = os.getenv("BASE_URL", "https://api.siliconflow.cn/v1")
+        self.base_url: str = env.get("BASE_URL", "https://api.siliconflow.cn/v1")
         
         # API密钥
-        self.api_key: Optional[str] = os.getenv("API_KEY")
+        self.api_key: Optional[str] = env.get("API_KEY")
         
         # 服务器配置
-        self.host: str = os.getenv("HOST", "0.0.0.0")
-        self.port: int = int(os.getenv("PORT", "8000"))
+        self.host: str = env.get("HOST", "0.0.0.0")
+        self.port: int = int(env.get("PORT", "8000"))
         
         # 日志级别
-        self.log_level: str = os.getenv("LOG_LEVEL", "INFO")
+        self.log_level: str = env.get("LOG_LEVEL", "INFO")
         
         # 超时时间
-        self.timeout: int = int(os.getenv("TIMEOUT", "30"))
-        self.dimensions: int = int(os.getenv("EMBEDDING_DIMENSIONS", "1024"))
+        self.timeout: int = int(env.get("TIMEOUT", "30"))
+        self.dimensions: int = int(env.get("EMBEDDING_DIMENSIONS", "1024"))
         
         # Meilisearch 配置
-        self.meilisearch_url: str = os.getenv("MEILISEARCH_URL", "http://meilisearch:7700")
-        self.meilisearch_api_key: Optional[str] = os.getenv("MEILI_MASTER_KEY")
+        self.meilisearch_url: str = env.get("MEILISEARCH_URL", "http://meilisearch:7700")
+        self.meilisearch_api_key: Optional[str] = env.get("MEILI_MASTER_KEY")
         
         # 本服务的URL，用于配置到 Meilisearch 的 embedder
-        self.service_url: str = os.getenv("SERVICE_URL", "http://embedding_proxy:8000")
-        
+        self.service_url: str = env.get("SERVICE_URL", "http://embedding_proxy:8000")
+
+        # 流量采样配置，CAPTURE_FILE 为空时不采样
+        self.capture_file: Optional[str] = env.get("CAPTURE_FILE") or None
+        self.capture_sample_rate: float = float(env.get("CAPTURE_SAMPLE_RATE", "1.0"))
+        self.capture_text: bool = env.get("CAPTURE_TEXT", "false").lower() in ("1", "true", "yes")
+
+        # 上游连接池与启动预热配置
+        self.max_connections: int = int(env.get("MAX_CONNECTIONS", "100"))
+        self.warmup_connections: int = int(env.get("WARMUP_CONNECTIONS", "4"))
+        self.warmup_timeout: float = float(env.get("WARMUP_TIMEOUT", "5"))
+        # 空闲连接保留时间（秒），需远大于就绪到流量到达的间隔，否则预热的连接会在使用前被关闭
+        self.keepalive_expiry: float = float(env.get("KEEPALIVE_EXPIRY", "300"))
+
+        # 向量导出/导入接口使用的目录，接口中的路径均相对于此目录
+        self.vector_export_dir: str = env.get("VECTOR_EXPORT_DIR", "./vector_exports")
+
+        # 搜索代理缓存配置，容量为 0 时关闭对应缓存
+        self.search_cache_size: int = int(env.get("SEARCH_CACHE_SIZE", "1000"))
+        self.search_cache_ttl: float = float(env.get("SEARCH_CACHE_TTL", "60"))
+        self.query_embedding_cache_size: int = int(env.get("QUERY_EMBEDDING_CACHE_SIZE", "10000"))
+        self.query_embedding_cache_ttl: float = float(env.get("QUERY_EMBEDDING_CACHE_TTL", "3600"))
+        self.task_poll_interval: float = float(env.get("TASK_POLL_INTERVAL", "1"))
+
+        # 输入归一化配置，在截断前对索引文本和查询文本执行
+        self.normalize_enabled: bool = env.get("NORMALIZE_ENABLED", "false").lower() in ("1", "true", "yes")
+        self.normalize_nfkc: bool = env.get("NORMALIZE_NFKC", "true").lower() in ("1", "true", "yes")
+        self.normalize_strip_markup: bool = env.get("NORMALIZE_STRIP_MARKUP", "true").lower() in ("1", "true", "yes")
+        self.normalize_collapse_whitespace: bool = env.get("NORMALIZE_COLLAPSE_WHITESPACE", "true").lower() in ("1", "true", "yes")
+        self.normalize_max_repeat: int = int(env.get("NORMALIZE_MAX_REPEAT", "0"))
+
+        # 配置文件监视间隔（秒），0 表示关闭，此时可通过 SIGHUP 或管理接口重新加载
+        self.config_watch_interval: float = float(env.get("CONFIG_WATCH_INTERVAL", "0"))
+
     def validate(self) -> bool:
         """验证配置是否有效"""
         if not self.api_key:
             raise ValueError("API_KEY environment variable is required")
+        if self.log_level.upper() not in LOG_LEVELS:
+            raise ValueError(f"LOG_LEVEL must be one of {sorted(LOG_LEVELS)}, got '{self.log_level}'")
         return True
     
     def validate_meilisearch(self) -> bool:
@@ -54,6 +91,15 @@ class Config:
             raise ValueError("MEILISEARCH_URL environment variable is required")
         return True
     
+    def get_normalizer_config(self) -> dict:
+        """获取输入归一化配置"""
+        return {
+            "nfkc": self.normalize_nfkc,
+            "strip_markup": self.normalize_strip_markup,
+            "collapse_whitespace": self.normalize_collapse_whitespace,
+            "max_repeat": self.normalize_max_repeat
+        }
+    
     def get_openai_config(self) -> dict:
         """获取OpenAI客户端配置"""
         return {
@@ -62,5 +108,105 @@ class Config:
             "timeout": self.timeout
         }
 
-# 全局配置实例
-config = Config()
+# 全局配置实例，由 get_config() 延迟创建，reload_config() 原子替换
+_config: Optional[Config] = None
+
+# 首次加载时进程已有的环境变量，优先级高于 .env，重新加载时不会被覆盖
+_process_env_keys: Set[str] = set()
+# 使用的 .env 文件路径以及从中加载的键
+_dotenv_path: str = ""
+_dotenv_keys: Set[str] = set()
+_reload_lock = threading.Lock()
+# setup_logging 添加的日志输出，重新配置时在新输出添加成功后再移除
+_log_handler_id: Optional[int] = None
+
+
+def _read_dotenv() -> Dict[str, str]:
+    """读取 .env 中需要写入环境变量的值（进程已有的环境变量优先）"""
+    from dotenv import dotenv_values
+
+    values = dotenv_values(_dotenv_path) if _dotenv_path else {}
+    return {
+        key: value for key, value in values.items()
+        if key not in _process_env_keys and value is not None
+    }
+
+
+def _merged_environ(values: Dict[str, str]) -> Dict[str, str]:
+    """应用 values 后的环境变量：上次从 .env 加载、本次已删除的键恢复为默认值"""
+    environ = {key: value for key, value in os.environ.items() if key not in _dotenv_keys}
+    environ.update(values)
+    return environ
+
+
+def _apply_dotenv(values: Dict[str, str]) -> None:
+    """将 .env 中的值写入环境变量；文件中已删除的键恢复为默认值"""
+    global _dotenv_keys
+    for key, value in values.items():
+        os.environ[key] = value
+    for key in _dotenv_keys - set(values):
+        os.environ.pop(key, None)
+    _dotenv_keys = set(values)
+
+
+def get_config() -> Config:
+    """获取全局配置实例，首次调用时加载 .env 文件"""
+    global _config, _process_env_keys, _dotenv_path
+    if _config is None:
+        from dotenv import find_dotenv
+
+        _process_env_keys = set(os.environ)
+        _dotenv_path = find_dotenv()
+        _apply_dotenv(_read_dotenv())
+        _config = Config()
+    return _config
+
+
+def get_config_path() -> str:
+    """获取使用的 .env 文件路径，没有找到时为空字符串"""
+    get_config()
+    return _dotenv_path
+
+
+def reload_config() -> Tuple[Config, Config, List[str]]:
+    """
+    重新读取 .env 文件并创建新配置，验证通过后原子替换全局配置，
+    返回 (旧配置, 新配置, 变更的配置项名称)；配置无效时抛出 ValueError 并保留旧配置
+    """
+    global _config
+    with _reload_lock:
+        old = get_config()
+        values = _read_dotenv()
+        new = Config(_merged_environ(values))
+        new.validate()
+        _apply_dotenv(values)
+        _config = new
+
+    changed = [name for name in vars(new) if getattr(old, name, None) != getattr(new, name)]
+    return old, new, changed
+
+
+def setup_logging(level: str) -> None:
+    """配置 loguru 日志输出；先添加新输出再移除旧输出，级别无效时抛出异常且原有输出不受影响"""
+    global _log_handler_id
+    from loguru import logger
+
+    handler_id = logger.add(
+        sys.stdout,
+        format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        level=level.upper()
+    )
+    # 首次配置时替换 loguru 默认的 stderr 输出（id 为 0）
+    old_id = 0 if _log_handler_id is None else _log_handler_id
+    try:
+        logger.remove(old_id)
+    except ValueError:
+        pass
+    _log_handler_id = handler_id
+
+
+def __getattr__(name: str):
+    # 兼容 `from .config import config` 的旧用法，首次访问时才加载配置
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,34 +1,268 @@
-from fastapi import FastAPI, Request, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional, Union, Dict, Any
+from contextlib import asynccontextmanager, contextmanager
+from fastapi import APIRouter, FastAPI, Request, HTTPException
+from pydantic import BaseModel, Field
+from typing import TYPE_CHECKING, List, Optional, Union, Dict, Any
+import asyncio
 import json
+import os
+import signal
+import threading
 import time
-import uvicorn
-from openai import OpenAI
 from loguru import logger
-import meilisearch
-from .config import config
-
-app = FastAPI(
-    title="SiliconFlow Embedding Proxy Server", 
-    version="1.0.0",
-    description="代理服务，转发嵌入请求到SiliconFlow API并打印请求详情"
-)
-
-# 配置日志
-logger.remove()
-logger.add(
-    lambda msg: print(msg, end=""),
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-    level=config.log_level
-)
-
-# 初始化OpenAI客户端
-client = OpenAI(
-    api_key=config.api_key,
-    base_url=config.base_url,
-    timeout=config.timeout
-)
+from .config import Config, get_config, get_config_path, reload_config, setup_logging
+from .capture import create_recorder
+from .search_cache import SearchCache
+from .normalize import TextNormalizer
+from .upstream import UpstreamClient
+
+if TYPE_CHECKING:
+    import meilisearch
+
+# 路由在导入时注册，应用实例由 create_app() 创建
+router = APIRouter()
+
+# 上游客户端及其连接池，首次使用时创建，热重载时替换
+_upstream: Optional[UpstreamClient] = None
+_upstream_lock = threading.Lock()
+
+# 流量采样器（未配置 CAPTURE_FILE 时为 None）
+_recorder = None
+_recorder_loaded = False
+
+# 输入归一化流水线（NORMALIZE_ENABLED 关闭时为 None）
+_normalizer: Optional[TextNormalizer] = None
+_normalizer_loaded = False
+
+# 混合搜索缓存，首次搜索时创建
+_search_cache: Optional[SearchCache] = None
+
+# 启动预热完成后置为 True，由 /ready 对外报告
+_ready = False
+
+# 热重载时各组件依赖的配置项
+UPSTREAM_FIELDS = {"api_key", "base_url", "timeout", "max_connections", "keepalive_expiry"}
+CAPTURE_FIELDS = {"capture_file", "capture_sample_rate", "capture_text"}
+NORMALIZE_FIELDS = {
+    "normalize_enabled", "normalize_nfkc", "normalize_strip_markup",
+    "normalize_collapse_whitespace", "normalize_max_repeat"
+}
+SEARCH_CACHE_FIELDS = {
+    "search_cache_size", "search_cache_ttl", "query_embedding_cache_size",
+    "query_embedding_cache_ttl", "task_poll_interval"
+}
+# 改变后已缓存的查询向量不再有效
+QUERY_VECTOR_FIELDS = {"model_name", "dimensions", "max_token_limit"} | NORMALIZE_FIELDS
+# 运行中无法生效，需要重启
+RESTART_FIELDS = {"host", "port", "config_watch_interval"}
+_reload_lock = threading.Lock()
+
+def _get_upstream_locked() -> UpstreamClient:
+    global _upstream
+    if _upstream is None:
+        _upstream = UpstreamClient.from_config(get_config())
+    return _upstream
+
+@contextmanager
+def upstream_client():
+    """
+    借用当前上游 OpenAI 客户端；热重载替换客户端后，
+    旧客户端会等借用它的请求全部结束再关闭连接池
+    """
+    with _upstream_lock:
+        upstream = _get_upstream_locked()
+        upstream.acquire()
+    try:
+        yield upstream.client
+    finally:
+        upstream.release()
+
+def get_recorder():
+    """获取流量采样器，首次调用时根据配置创建"""
+    global _recorder, _recorder_loaded
+    if not _recorder_loaded:
+        config = get_config()
+        _recorder = create_recorder(config.capture_file, config.capture_sample_rate, config.capture_text)
+        _recorder_loaded = True
+    return _recorder
+
+def get_normalizer() -> Optional[TextNormalizer]:
+    """获取输入归一化流水线，首次调用时根据配置创建"""
+    global _normalizer, _normalizer_loaded
+    if not _normalizer_loaded:
+        config = get_config()
+        if config.normalize_enabled:
+            _normalizer = TextNormalizer(**config.get_normalizer_config())
+        _normalizer_loaded = True
+    return _normalizer
+
+def get_search_cache() -> SearchCache:
+    """获取搜索缓存，首次调用时根据配置创建"""
+    global _search_cache
+    if _search_cache is None:
+        config = get_config()
+        _search_cache = SearchCache(
+            result_size=config.search_cache_size,
+            result_ttl=config.search_cache_ttl,
+            embedding_size=config.query_embedding_cache_size,
+            embedding_ttl=config.query_embedding_cache_ttl,
+            poll_interval=config.task_poll_interval
+        )
+    return _search_cache
+
+def warmup_upstream() -> int:
+    """预热当前上游客户端的连接池，返回成功预热的连接数"""
+    config = get_config()
+    with _upstream_lock:
+        upstream = _get_upstream_locked()
+    return upstream.warmup(config.warmup_connections, config.warmup_timeout)
+
+def swap_upstream(config: Config) -> None:
+    """创建并预热新的上游客户端后原子替换，旧客户端在在途请求结束后关闭"""
+    global _upstream
+    upstream = UpstreamClient.from_config(config)
+    if config.warmup_connections > 0:
+        upstream.warmup(config.warmup_connections, config.warmup_timeout)
+
+    with _upstream_lock:
+        old = _upstream
+        _upstream = upstream
+    if old is not None:
+        # OpenAI 客户端默认最多重试 2 次，单个请求最长约为 3 倍超时
+        old.retire(drain_timeout=old.timeout * 3)
+
+def reload_components() -> Dict[str, Any]:
+    """
+    重新加载配置，只重建配置发生变化且已创建的组件；
+    连接池、缓存和统计在配置未变化时保持不变
+    """
+    global _recorder, _normalizer
+    with _reload_lock:
+        old, new, changed = reload_config()
+        changed_fields = set(changed)
+        rebuilt = []
+
+        if changed_fields & UPSTREAM_FIELDS and _upstream is not None:
+            swap_upstream(new)
+            rebuilt.append("upstream")
+
+        if changed_fields & CAPTURE_FIELDS and _recorder_loaded:
+            old_recorder = _recorder
+            _recorder = create_recorder(new.capture_file, new.capture_sample_rate, new.capture_text)
+            if old_recorder is not None:
+                old_recorder.close()
+            rebuilt.append("capture")
+
+        if changed_fields & NORMALIZE_FIELDS and _normalizer_loaded:
+            old_normalizer = _normalizer
+            normalizer = TextNormalizer(**new.get_normalizer_config()) if new.normalize_enabled else None
+            if normalizer is not None and old_normalizer is not None:
+                normalizer.copy_stats_from(old_normalizer)
+            _normalizer = normalizer
+            rebuilt.append("normalizer")
+
+        if _search_cache is not None:
+            if changed_fields & SEARCH_CACHE_FIELDS:
+                _search_cache.configure(
+                    result_size=new.search_cache_size,
+                    result_ttl=new.search_cache_ttl,
+                    embedding_size=new.query_embedding_cache_size,
+                    embedding_ttl=new.query_embedding_cache_ttl,
+                    poll_interval=new.task_poll_interval
+                )
+                rebuilt.append("search_cache")
+            if changed_fields & QUERY_VECTOR_FIELDS:
+                _search_cache.clear()
+
+        if "log_level" in changed_fields:
+            setup_logging(new.log_level)
+            rebuilt.append("logging")
+
+    restart_required = sorted(changed_fields & RESTART_FIELDS)
+    if restart_required:
+        logger.warning(f"以下配置需要重启服务才能生效: {restart_required}")
+    logger.info(f"配置已重新加载, 变更项: {sorted(changed_fields)}, 重建组件: {rebuilt}")
+    return {
+        "changed": sorted(changed_fields),
+        "rebuilt": rebuilt,
+        "restart_required": restart_required
+    }
+
+def _reload_in_background() -> None:
+    """供信号和文件监视调用的重新加载，失败时保留旧配置"""
+    try:
+        reload_components()
+    except Exception as e:
+        logger.error(f"重新加载配置失败，继续使用旧配置: {str(e)}")
+
+async def watch_config_file(path: str, interval: float) -> None:
+    """定期检查 .env 文件的修改时间，变化时重新加载配置"""
+    def mtime() -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    loop = asyncio.get_running_loop()
+    last = mtime()
+    while True:
+        await asyncio.sleep(interval)
+        current = mtime()
+        if current != last:
+            last = current
+            logger.info(f"检测到配置文件 {path} 变化，重新加载配置")
+            await loop.run_in_executor(None, _reload_in_background)
+
+def close_clients() -> None:
+    """关闭上游连接池和采样文件"""
+    global _upstream, _recorder, _recorder_loaded
+    with _upstream_lock:
+        upstream = _upstream
+        _upstream = None
+    if upstream is not None:
+        upstream.close()
+    if _recorder is not None:
+        _recorder.close()
+    _recorder = None
+    _recorder_loaded = False
+
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    """
+    应用生命周期：启动时预热上游连接，预热完成后才报告就绪；
+    运行期间响应 SIGHUP 并按需监视 .env 文件以热重载配置
+    """
+    global _ready
+    config = get_config()
+    loop = asyncio.get_running_loop()
+    if config.api_key and config.warmup_connections > 0:
+        await loop.run_in_executor(None, warmup_upstream)
+
+    sighup_installed = False
+    if hasattr(signal, "SIGHUP"):
+        try:
+            loop.add_signal_handler(
+                signal.SIGHUP,
+                lambda: loop.run_in_executor(None, _reload_in_background)
+            )
+            sighup_installed = True
+        except (NotImplementedError, RuntimeError, ValueError):
+            logger.warning("当前环境无法注册 SIGHUP，配置热重载仅可通过管理接口触发")
+
+    watcher = None
+    config_path = get_config_path()
+    if config.config_watch_interval > 0 and config_path:
+        watcher = asyncio.create_task(watch_config_file(config_path, config.config_watch_interval))
+
+    _ready = True
+    try:
+        yield
+    finally:
+        _ready = False
+        if watcher is not None:
+            watcher.cancel()
+        if sighup_installed:
+            loop.remove_signal_handler(signal.SIGHUP)
+        close_clients()
 
 class EmbeddingRequest(BaseModel):
     input: Union[str, List[str]]
@@ -48,13 +282,63 @@ class MeilisearchConfigResponse(BaseModel):
     success: bool
     message: str
     task_uid: Optional[int] = None
+
+class VectorExportRequest(BaseModel):
+    path: str
+    batch_size: int = Field(1000, gt=0)
+
+class VectorImportRequest(BaseModel):
+    path: str
+    batch_size: int = Field(1000, gt=0)
+    wait: bool = False
+    
+
+def prepare_inputs(input_list: List[str]) -> List[str]:
+    """对输入文本做归一化并应用token限制，索引文本和查询文本都经过此处理"""
+    config = get_config()
+    normalizer = get_normalizer()
+    if normalizer is not None:
+        input_list = normalizer.normalize_batch(input_list)
+
+    final_input = []
+    for input_item in input_list:
+        if len(input_item) > config.max_token_limit:
+            truncated_input = input_item[:config.max_token_limit]
+            logger.warning(f"输入文本超过{config.max_token_limit}字符限制，已截断")
+            final_input.append(truncated_input)
+        else:
+            final_input.append(input_item)
+    return final_input
+
+def request_embeddings(final_input: List[str]):
+    """调用上游生成嵌入，返回 OpenAI 响应对象"""
+    config = get_config()
+    
+    # 构建请求参数
+    embedding_params = {
+        "model": config.model_name,
+        "input": final_input,
+    }
     
+    # 添加可选参数
+    
+    embedding_params["encoding_format"] = "float"  # 默认使用float格式
+    embedding_params["dimensions"] = config.dimensions  # 默认使用1024维度
+
+    with upstream_client() as client:
+        response = client.embeddings.create(**embedding_params)
 
-@app.post("/v1/embeddings")
+    normalizer = get_normalizer()
+    if normalizer is not None and response.usage is not None:
+        normalizer.record_usage(sum(len(item) for item in final_input), response.usage.prompt_tokens)
+    return response
+
+@router.post("/v1/embeddings")
 async def create_embeddings(request: EmbeddingRequest, raw_request: Request):
     """
     接收嵌入请求并转发到SiliconFlow API
     """
+    config = get_config()
     
     logger.info("=== 转发请求 ===")
     
@@ -63,15 +347,12 @@ async def create_embeddings(request: EmbeddingRequest, raw_request: Request):
         input_list = [request.input]
     else:
         input_list = request.input
-    
-    final_input = []
-    for input_item in input_list:
-        if len(input_item) > config.max_token_limit:
-            truncated_input = input_item[:config.max_token_limit]
-            logger.warning(f"输入文本超过{config.max_token_limit}字符限制，已截断")
-            final_input.append(truncated_input)
-        else:
-            final_input.append(input_item)
+
+    recorder = get_recorder()
+    if recorder is not None and input_list:
+        recorder.record(input_list)
+
+    final_input = prepare_inputs(input_list)
     
     if not final_input:
         logger.error("输入为空")
@@ -82,23 +363,14 @@ async def create_embeddings(request: EmbeddingRequest, raw_request: Request):
     
     logger.info(f"使用模型: {model_to_use}")
     logger.info(f"输入数量: {len(final_input)}")
+    if get_normalizer() is not None:
+        logger.info(f"归一化及截断后字符数: {sum(len(item) for item in input_list)} -> {sum(len(item) for item in final_input)}")
     
     try:
         # 使用OpenAI客户端创建嵌入
         logger.info("正在调用OpenAI客户端...")
         
-        # 构建请求参数
-        embedding_params = {
-            "model": model_to_use,
-            "input": final_input,
-        }
-        
-        # 添加可选参数
-        
-        embedding_params["encoding_format"] = "float"  # 默认使用float格式
-        embedding_params["dimensions"] = config.dimensions  # 默认使用1024维度
-
-        response = client.embeddings.create(**embedding_params)
+        response = request_embeddings(final_input)
         
         logger.info("=== SiliconFlow API 响应成功 ===")
         logger.info(f"响应数据条数: {len(response.data)}")
@@ -144,6 +416,9 @@ async def create_embeddings(request: EmbeddingRequest, raw_request: Request):
 
 def get_meilisearch_client():
     """获取 Meilisearch 客户端"""
+    import meilisearch
+
+    config = get_config()
     try:
         config.validate_meilisearch()
         client = meilisearch.Client(
@@ -158,7 +433,7 @@ def get_meilisearch_client():
             detail=f"Failed to connect to Meilisearch: {str(e)}"
         )
 
-def wait_task(client: meilisearch.Client, task_info) -> bool:
+def wait_task(client: "meilisearch.Client", task_info) -> bool:
     """等待 Meilisearch 任务完成"""
     logger.info(f"等待任务完成: {task_info}")
     
@@ -196,6 +471,7 @@ def is_embedder_already_configured(embedders_config: Dict[str, Any], embedder_na
     """
     检查是否已经配置了相同的 embedder
     """
+    config = get_config()
     if embedder_name not in embedders_config:
         return False
     
@@ -210,11 +486,12 @@ def is_embedder_already_configured(embedders_config: Dict[str, Any], embedder_na
         existing_config.get("documentTemplateMaxBytes") == config.max_token_limit
     )
 
-@app.post("/v1/meilisearch/embedder", response_model=MeilisearchConfigResponse)
+@router.post("/v1/meilisearch/embedder", response_model=MeilisearchConfigResponse)
 async def configure_meilisearch_embedder(request: MeilisearchConfigRequest):
     """
     配置 Meilisearch 索引的 embedder
     """
+    config = get_config()
     logger.info("=== 配置 Meilisearch Embedder ===")
     logger.info(f"索引ID: {request.index_id}")
     logger.info(f"Embedder名称: {request.embedder_name}")
@@ -323,7 +600,7 @@ async def configure_meilisearch_embedder(request: MeilisearchConfigRequest):
     finally:
         logger.info("=" * 50)
 
-@app.get("/v1/meilisearch/tasks")
+@router.get("/v1/meilisearch/tasks")
 async def get_meilisearch_tasks():
     """
     获取 Meilisearch 任务列表
@@ -351,7 +628,7 @@ async def get_meilisearch_tasks():
             detail=f"Failed to get tasks: {str(e)}"
         )
 
-@app.get("/v1/meilisearch/indexes/{index_id}/embedders")
+@router.get("/v1/meilisearch/indexes/{index_id}/embedders")
 async def get_index_embedders(index_id: str):
     """
     获取指定索引的 embedder 配置
@@ -398,7 +675,203 @@ async def get_index_embedders(index_id: str):
             detail=f"Failed to get embedders for index '{index_id}': {str(e)}"
         )
 
-@app.get("/v1/meilisearch/indexes")
+def resolve_export_path(path: str) -> str:
+    """将接口传入的路径解析到 VECTOR_EXPORT_DIR 下，禁止越出该目录"""
+    config = get_config()
+    base_dir = os.path.realpath(config.vector_export_dir)
+    target = os.path.realpath(os.path.join(base_dir, path))
+    if os.path.commonpath([base_dir, target]) != base_dir:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Path '{path}' must be inside the vector export directory"
+        )
+    return target
+
+# 导出/导入耗时较长，使用同步函数让 FastAPI 在线程池中执行，避免阻塞嵌入请求
+@router.post("/v1/meilisearch/indexes/{index_id}/embedders/{embedder_name}/export")
+def export_index_vectors(index_id: str, embedder_name: str, request: VectorExportRequest):
+    """
+    导出指定索引 embedder 的全部向量到磁盘
+    """
+    from .vectors import export_vectors
+
+    logger.info(f"导出索引 '{index_id}' 的 embedder '{embedder_name}' 向量")
+    output_dir = resolve_export_path(request.path)
+    
+    try:
+        client = get_meilisearch_client()
+        result = export_vectors(client, index_id, embedder_name, output_dir, request.batch_size)
+        return {
+            "success": True,
+            "path": output_dir,
+            **result
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        if "index_not_found" in str(e).lower() or "404" in str(e):
+            raise HTTPException(
+                status_code=404,
+                detail=f"Index '{index_id}' not found"
+            )
+        logger.error(f"导出向量失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to export vectors for index '{index_id}': {str(e)}"
+        )
+
+@router.post("/v1/meilisearch/indexes/{index_id}/embedders/{embedder_name}/import")
+def import_index_vectors(index_id: str, embedder_name: str, request: VectorImportRequest):
+    """
+    将磁盘上导出的向量作为用户提供的向量导入指定索引
+    """
+    from .vectors import import_vectors
+
+    logger.info(f"导入向量到索引 '{index_id}' 的 embedder '{embedder_name}'")
+    input_dir = resolve_export_path(request.path)
+    
+    try:
+        client = get_meilisearch_client()
+        result = import_vectors(
+            client,
+            index_id,
+            input_dir,
+            embedder_name=embedder_name,
+            batch_size=request.batch_size,
+            wait=request.wait
+        )
+        # 等待任务完成时，任一批次失败即视为导入失败
+        return {
+            "success": result.get("status") != "failed",
+            **result
+        }
+        
+    except HTTPException:
+        raise
+    except FileNotFoundError as e:
+        raise HTTPException(
+            status_code=404,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    except Exception as e:
+        logger.error(f"导入向量失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to import vectors into index '{index_id}': {str(e)}"
+        )
+
+def is_proxy_embedder(client: "meilisearch.Client", index_id: str, embedder_name: str) -> bool:
+    """判断索引的 embedder 是否指向本代理，只有此时才能由代理预先计算查询向量"""
+    config = get_config()
+    cache = get_search_cache()
+    embedders = cache.embedders.get((index_id,))
+    if embedders is None:
+        generation = cache.generation(index_id)
+        settings = client.index(index_id).get_embedders()
+        embedders = settings.embedders if settings and settings.embedders else {}
+        cache.store(cache.embedders, (index_id,), embedders, generation)
+
+    embedder = embedders.get(embedder_name)
+    if embedder is None:
+        return False
+    url = embedder.get("url") if isinstance(embedder, dict) else getattr(embedder, "url", None)
+    return url == f"{config.service_url}/v1/embeddings"
+
+def get_query_vector(index_id: str, embedder_name: str, query: str) -> List[float]:
+    """获取查询向量，未命中缓存时调用上游生成"""
+    cache = get_search_cache()
+    key = (index_id, embedder_name, query)
+    vector = cache.embeddings.get(key)
+    if vector is not None:
+        cache.record_saved_upstream_call()
+        return vector
+
+    generation = cache.generation(index_id)
+    response = request_embeddings(prepare_inputs([query]))
+    vector = response.data[0].embedding
+    cache.store(cache.embeddings, key, vector, generation)
+    return vector
+
+# Meilisearch SDK 为同步调用，使用同步函数让 FastAPI 在线程池中执行
+@router.post("/v1/meilisearch/indexes/{index_id}/search")
+def search_index(index_id: str, body: Dict[str, Any]):
+    """
+    带缓存的搜索代理，请求体与 Meilisearch 搜索接口相同。
+    混合搜索且 embedder 指向本代理时，由代理计算（并缓存）查询向量随请求传入，
+    Meilisearch 不再回调嵌入接口
+    """
+    logger.info(f"搜索索引 '{index_id}'")
+    hybrid = body.get("hybrid")
+    if hybrid is not None and not isinstance(hybrid, dict):
+        raise HTTPException(
+            status_code=400,
+            detail="'hybrid' must be an object"
+        )
+    query = body.get("q")
+    if query is not None and not isinstance(query, str):
+        raise HTTPException(
+            status_code=400,
+            detail="'q' must be a string"
+        )
+    cache = get_search_cache()
+    
+    try:
+        client = get_meilisearch_client()
+        cache.poll_tasks(client)
+
+        key = (index_id, json.dumps(body, sort_keys=True, ensure_ascii=False))
+        result = cache.results.get(key)
+        if result is not None:
+            if hybrid and query and "vector" not in body and \
+                    is_proxy_embedder(client, index_id, hybrid.get("embedder", "default")):
+                cache.record_saved_upstream_call()
+            logger.info(f"索引 '{index_id}' 搜索命中缓存")
+            return result
+
+        # 在查询之前记录失效代数，查询期间索引被失效时不缓存可能过期的结果
+        generation = cache.generation(index_id)
+        params = dict(body)
+        params.pop("q", None)
+        if hybrid and query and "vector" not in params:
+            embedder_name = hybrid.get("embedder", "default")
+            if is_proxy_embedder(client, index_id, embedder_name):
+                params["vector"] = get_query_vector(index_id, embedder_name, query)
+
+        result = client.index(index_id).search(query, params)
+        cache.store(cache.results, key, result, generation)
+        return result
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"搜索索引 '{index_id}' 失败: {str(e)}")
+        if "index_not_found" in str(e).lower():
+            raise HTTPException(
+                status_code=404,
+                detail=f"Index '{index_id}' not found"
+            )
+        raise HTTPException(
+            status_code=getattr(e, "status_code", None) or 500,
+            detail=f"Failed to search index '{index_id}': {str(e)}"
+        )
+
+@router.get("/v1/meilisearch/search/stats")
+async def get_search_stats():
+    """
+    获取搜索缓存命中率与节省的上游调用次数
+    """
+    return {
+        "success": True,
+        "stats": get_search_cache().stats()
+    }
+
+@router.get("/v1/meilisearch/indexes")
 async def get_meilisearch_indexes():
     """
     获取 Meilisearch 索引列表
@@ -431,9 +904,10 @@ async def get_meilisearch_indexes():
             detail=f"Failed to get indexes: {str(e)}"
         )
 
-@app.get("/")
+@router.get("/")
 async def root():
     logger.info("访问根路径")
+    config = get_config()
     return {
         "message": "Meilisearch Embedding Proxy Server is running",
         "description": "This server forwards embedding requests to Self hosted openai API and configures Meilisearch embedders",
@@ -449,14 +923,34 @@ async def root():
             "meilisearch_tasks": "GET /v1/meilisearch/tasks",
             "meilisearch_indexes": "GET /v1/meilisearch/indexes",
             "index_embedders": "GET /v1/meilisearch/indexes/{index_id}/embedders",
+            "export_vectors": "POST /v1/meilisearch/indexes/{index_id}/embedders/{embedder_name}/export",
+            "import_vectors": "POST /v1/meilisearch/indexes/{index_id}/embedders/{embedder_name}/import",
+            "search": "POST /v1/meilisearch/indexes/{index_id}/search",
+            "search_stats": "GET /v1/meilisearch/search/stats",
+            "normalization_stats": "GET /v1/normalization/stats",
+            "reload_config": "POST /v1/admin/reload",
             "health": "GET /health",
+            "ready": "GET /ready",
             "docs": "GET /docs"
         }
     }
 
-@app.get("/health")
+@router.get("/v1/normalization/stats")
+async def get_normalization_stats():
+    """
+    获取输入归一化移除的字符数与估算的 token 数
+    """
+    normalizer = get_normalizer()
+    return {
+        "success": True,
+        "enabled": normalizer is not None,
+        "stats": normalizer.stats() if normalizer is not None else None
+    }
+
+@router.get("/health")
 async def health_check():
     logger.info("健康检查")
+    config = get_config()
     try:
         # 验证基本配置
         config.validate()
@@ -464,6 +958,8 @@ async def health_check():
         # 检查 Meilisearch 连接
         meilisearch_status = "unknown"
         try:
+            import meilisearch
+
             config.validate_meilisearch()
             client = meilisearch.Client(config.meilisearch_url, config.meilisearch_api_key)
             # 尝试获取版本信息来测试连接
@@ -491,13 +987,77 @@ async def health_check():
             "meilisearch_status": "unknown"
         }
 
-def create_app():
+# 重新加载时可能需要预热新的连接池，使用同步函数在线程池中执行
+@router.post("/v1/admin/reload")
+def reload_configuration():
+    """
+    重新加载 .env 配置，只重建发生变化的组件，旧上游连接池在在途请求结束后关闭
+    """
+    logger.info("=== 重新加载配置 ===")
+    
+    try:
+        result = reload_components()
+        return {
+            "success": True,
+            **result
+        }
+        
+    except ValueError as e:
+        logger.error(f"配置无效，继续使用旧配置: {str(e)}")
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid configuration: {str(e)}"
+        )
+    except Exception as e:
+        logger.error(f"重新加载配置失败: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to reload configuration: {str(e)}"
+        )
+
+@router.get("/ready")
+async def readiness_check():
+    """就绪检查，启动预热完成前返回 503；就绪后同时报告上游连接预热成功的数量"""
+    if not _ready:
+        raise HTTPException(status_code=503, detail="Service is warming up")
+    upstream = _upstream
+    return {
+        "status": "ready",
+        "upstream_connections": {
+            "warmed": upstream.warmed if upstream is not None else 0,
+            "requested": upstream.warmup_requested if upstream is not None else 0
+        }
+    }
+
+def create_app(configure_logging: bool = True) -> FastAPI:
     """创建 FastAPI 应用实例"""
-    return app
+    config = get_config()
+    if configure_logging:
+        setup_logging(config.log_level)
+
+    application = FastAPI(
+        title="SiliconFlow Embedding Proxy Server", 
+        version="1.0.0",
+        description="代理服务，转发嵌入请求到SiliconFlow API并打印请求详情",
+        lifespan=lifespan
+    )
+    application.include_router(router)
+    return application
+
+def __getattr__(name: str):
+    # 兼容 `from .fastapi_server import app` 的旧用法，首次访问时才创建应用
+    if name == "app":
+        application = create_app()
+        globals()["app"] = application
+        return application
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def run_server(host=None, port=None):
     """运行服务器"""
+    import uvicorn
+
+    config = get_config()
     # 使用配置文件中的默认值
     host = host or config.host
     port = port or config.port
@@ -519,7 +1079,7 @@ def run_server(host=None, port=None):
     logger.info(f"API基础URL: {config.base_url}")
     logger.info("功能: 转发请求到 SiliconFlow API 并打印请求详情")
     
-    uvicorn.run(app, host=host, port=port, log_level=config.log_level.lower())
+    uvicorn.run(create_app(), host=host, port=port, log_level=config.log_level.lower())
 
 
 if __name__ == "__main__":
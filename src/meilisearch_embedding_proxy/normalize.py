@@ -0,0 +1,177 @@
+"""
+输入归一化模块
+在截断前清理 documentTemplate 渲染结果和查询文本中的冗余内容（标记、零宽字符、
+重复字符/行、多余空白），减少发送到上游的字符数和 token 数
+"""
+import html
+import re
+import threading
+import unicodedata
+from typing import Any, Callable, Dict, List
+
+# 普通标签；标签的属性必须带值，避免把 "a<b and c>d" 这类比较表达式当作标签删除（无值属性的标签会保留）
+_TAG_RE = re.compile(
+    r"</?[a-zA-Z][\w:-]*(?:\s+[\w:.-]+\s*=\s*(?:\"[^\"]*\"|'[^']*'|[^\s\"'<>=`]+))*\s*/?>"
+)
+# HTML 注释和 script/style 块的起始标记；结束标记单独查找，保证整体为线性扫描
+_BLOCK_START_RE = re.compile(r"<!--|<(script|style)\b[^<>]*>", re.I)
+_BLOCK_END_RES = {
+    "script": re.compile(r"</script\s*>", re.I),
+    "style": re.compile(r"</style\s*>", re.I),
+}
+# 零宽空格、软连字符、方向控制符、BOM 等不可见字符（NFKC 不会移除）；
+# 保留 ZWNJ/ZWJ (U+200C/U+200D)，它们影响波斯语等文字的词形和 emoji 组合序列
+_INVISIBLE_RE = re.compile("[\u00ad\u180e\u200b\u200e\u200f\u202a-\u202e\u2060-\u2064\ufeff]")
+_HSPACE_RE = re.compile(r"[^\S\n]+")
+_NEWLINES_RE = re.compile(r"\s*\n\s*")
+
+
+def _strip_blocks(text: str) -> str:
+    """
+    删除 HTML 注释和 script/style 块。每个位置只扫描一次：
+    找不到结束标记时保留剩余文本并停止，避免正则回溯导致未闭合的 "<!--" 耗费平方时间
+    """
+    parts = []
+    pos = 0
+    while True:
+        start = _BLOCK_START_RE.search(text, pos)
+        if start is None:
+            break
+        tag = start.group(1)
+        if tag is None:
+            end = text.find("-->", start.end())
+            end = end + 3 if end >= 0 else -1
+        else:
+            match = _BLOCK_END_RES[tag.lower()].search(text, start.end())
+            end = match.end() if match else -1
+        if end < 0:
+            break
+        parts.append(text[pos:start.start()])
+        parts.append(" ")
+        pos = end
+    if not parts:
+        return text
+    parts.append(text[pos:])
+    return "".join(parts)
+
+
+def _strip_markup(text: str) -> str:
+    if "<" in text:
+        text = _TAG_RE.sub(" ", _strip_blocks(text))
+    if "&" in text:
+        text = html.unescape(text)
+    return text
+
+
+def _unicode_cleanup(text: str) -> str:
+    if text.isascii():
+        return text
+    # is_normalized 是快速检查，大多数已规范的文本可以跳过完整的归一化
+    if not unicodedata.is_normalized("NFKC", text):
+        text = unicodedata.normalize("NFKC", text)
+    return _INVISIBLE_RE.sub("", text)
+
+
+def _collapse_whitespace(text: str) -> str:
+    text = _HSPACE_RE.sub(" ", text)
+    if "\n" in text:
+        text = _NEWLINES_RE.sub("\n", text)
+    return text.strip()
+
+
+def _make_repeat_trimmer(max_repeat: int) -> Callable[[str], str]:
+    """
+    同一标点/符号或空白字符连续出现超过 max_repeat 次时截断，同一行重复出现超过 max_repeat 次时删除多余的行；
+    字母、数字和汉字的连续重复（如 "1000000"）有实际含义，不做截断
+    """
+    symbol_run_re = re.compile(r"([^\w\s]|_)\1{%d,}" % max_repeat)
+    space_run_re = re.compile(r"(\s)\1{%d,}" % max_repeat)
+
+    def trim(text: str) -> str:
+        text = symbol_run_re.sub(lambda m: m.group(1) * max_repeat, text)
+        text = space_run_re.sub(lambda m: m.group(1) * max_repeat, text)
+        if "\n" not in text:
+            return text
+        seen: Dict[str, int] = {}
+        lines = []
+        for line in text.split("\n"):
+            key = line.strip()
+            if key:
+                count = seen.get(key, 0) + 1
+                seen[key] = count
+                if count > max_repeat:
+                    continue
+            lines.append(line)
+        return "\n".join(lines)
+
+    return trim
+
+
+class TextNormalizer:
+    """按配置预先组装的归一化流水线，并统计移除的字符数"""
+
+    def __init__(self, nfkc: bool = True, strip_markup: bool = True,
+                 collapse_whitespace: bool = True, max_repeat: int = 0):
+        # 顺序：先去标记（会引入空白），再做 Unicode 归一化，重复截断需要在合并换行之前
+        self._steps: List[Callable[[str], str]] = []
+        if strip_markup:
+            self._steps.append(_strip_markup)
+        if nfkc:
+            self._steps.append(_unicode_cleanup)
+        if max_repeat > 0:
+            self._steps.append(_make_repeat_trimmer(max_repeat))
+        if collapse_whitespace:
+            self._steps.append(_collapse_whitespace)
+
+        self.texts = 0
+        self.chars_in = 0
+        self.chars_out = 0
+        # 用于按上游实际计费估算节省的 token 数
+        self.chars_sent = 0
+        self.prompt_tokens = 0
+        self._lock = threading.Lock()
+
+    def normalize(self, text: str) -> str:
+        """归一化单条文本"""
+        for step in self._steps:
+            text = step(text)
+        return text
+
+    def normalize_batch(self, texts: List[str]) -> List[str]:
+        """归一化一批文本并累计统计；结果为空时保留原文，避免向上游发送空字符串"""
+        result = [self.normalize(text) or text for text in texts]
+        chars_in = sum(len(text) for text in texts)
+        chars_out = sum(len(text) for text in result)
+        with self._lock:
+            self.texts += len(texts)
+            self.chars_in += chars_in
+            self.chars_out += chars_out
+        return result
+
+    def copy_stats_from(self, other: "TextNormalizer") -> None:
+        """热重载重建流水线时沿用之前的统计"""
+        with self._lock:
+            self.texts = other.texts
+            self.chars_in = other.chars_in
+            self.chars_out = other.chars_out
+            self.chars_sent = other.chars_sent
+            self.prompt_tokens = other.prompt_tokens
+
+    def record_usage(self, chars_sent: int, prompt_tokens: int) -> None:
+        """记录上游实际收到的字符数和 token 数"""
+        with self._lock:
+            self.chars_sent += chars_sent
+            self.prompt_tokens += prompt_tokens
+
+    def stats(self) -> Dict[str, Any]:
+        """移除的字符数及按上游 token/字符比估算的 token 数"""
+        chars_removed = self.chars_in - self.chars_out
+        tokens_per_char = self.prompt_tokens / self.chars_sent if self.chars_sent else 0.0
+        return {
+            "texts": self.texts,
+            "chars_in": self.chars_in,
+            "chars_out": self.chars_out,
+            "chars_removed": chars_removed,
+            "removed_ratio": round(chars_removed / self.chars_in, 4) if self.chars_in else 0.0,
+            "estimated_tokens_removed": int(chars_removed * tokens_per_char),
+        }
@@ -0,0 +1,237 @@
+"""
+搜索缓存模块
+缓存混合搜索的查询向量和搜索结果，并通过轮询 Meilisearch 任务列表，
+在索引的文档或设置任务成功后失效该索引的缓存
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    import meilisearch
+
+# 只改变文档的任务：失效搜索结果
+DOCUMENT_TASK_TYPES = {"documentAdditionOrUpdate", "documentDeletion", "documentEdition"}
+# 可能改变 embedder 的任务：同时失效查询向量和 embedder 配置
+SETTINGS_TASK_TYPES = {"settingsUpdate", "indexDeletion", "indexUpdate"}
+# 涉及多个索引的任务：清空全部缓存
+GLOBAL_TASK_TYPES = {"indexSwap"}
+
+# 每次轮询读取的任务数，新任务数达到该值时说明可能有遗漏，直接清空全部缓存
+TASK_POLL_LIMIT = 100
+
+
+def _utc(value: datetime) -> datetime:
+    """SDK 将 finishedAt 解析为无时区的 UTC 时间（截断到微秒），统一为无时区 UTC 以便比较"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class TTLCache:
+    """带过期时间的 LRU 缓存，键的第一个元素为索引 ID 时可按索引失效"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def resize(self, maxsize: int, ttl: float) -> None:
+        """调整容量和过期时间，保留现有条目（超出容量时淘汰最久未使用的）"""
+        with self._lock:
+            self.maxsize = maxsize
+            self.ttl = ttl
+            while len(self._data) > max(maxsize, 0):
+                self._data.popitem(last=False)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """删除满足条件的键，返回删除数量"""
+        with self._lock:
+            keys = [key for key in self._data if predicate(key)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def invalidate_index(self, index_id: str) -> int:
+        return self.invalidate(lambda key: key[0] == index_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SearchCache:
+    """混合搜索的查询向量缓存、结果缓存与基于任务的失效"""
+
+    def __init__(self, result_size: int = 1000, result_ttl: float = 60.0,
+                 embedding_size: int = 10000, embedding_ttl: float = 3600.0,
+                 poll_interval: float = 1.0):
+        self.results = TTLCache(result_size, result_ttl)
+        self.embeddings = TTLCache(embedding_size, embedding_ttl)
+        self.embedders = TTLCache(256, embedding_ttl)
+        self.poll_interval = poll_interval
+        self.saved_upstream_calls = 0
+        self.invalidations = 0
+        # 失效代数：查询开始前记录，写入缓存时代数已变说明结果可能基于失效前的数据
+        self._generation = 0
+        self._index_generations: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # 已处理任务的最大 finishedAt 以及恰好在该时刻完成的任务，
+        # 任务不一定按 uid 顺序完成（如 taskCancelation 会优先执行），因此不能用 uid 作为水位
+        self._last_finished_at: Optional[datetime] = None
+        self._last_finished_uids: Set[int] = set()
+        self._last_poll = 0.0
+        self._poll_lock = threading.Lock()
+
+    def configure(self, result_size: int, result_ttl: float, embedding_size: int,
+                  embedding_ttl: float, poll_interval: float) -> None:
+        """热重载时调整缓存参数，已缓存的内容和统计保持不变"""
+        self.results.resize(result_size, result_ttl)
+        self.embeddings.resize(embedding_size, embedding_ttl)
+        self.embedders.resize(self.embedders.maxsize, embedding_ttl)
+        self.poll_interval = poll_interval
+
+    def generation(self, index_id: str) -> Tuple[int, int]:
+        """获取索引当前的失效代数，在查询 Meilisearch 或上游之前调用"""
+        with self._lock:
+            return self._generation, self._index_generations.get(index_id, 0)
+
+    def store(self, cache: TTLCache, key: Hashable, value: Any, generation: Tuple[int, int]) -> bool:
+        """
+        仅当索引自 generation 记录以来没有失效时写入缓存，
+        避免并发失效之后写入基于旧数据的结果；返回是否写入
+        """
+        with self._lock:
+            if (self._generation, self._index_generations.get(key[0], 0)) != generation:
+                return False
+            cache.set(key, value)
+            return True
+
+    def record_saved_upstream_call(self) -> None:
+        """记录一次因缓存命中而省去的上游嵌入调用"""
+        with self._lock:
+            self.saved_upstream_calls += 1
+
+    def invalidate_index(self, index_id: str, settings: bool = False) -> None:
+        """失效索引的搜索结果；settings 为 True 时同时失效查询向量和 embedder 配置"""
+        # 先递增代数再删除条目，删除之后不会再有失效前开始的查询写入
+        with self._lock:
+            self._index_generations[index_id] = self._index_generations.get(index_id, 0) + 1
+            self.invalidations += 1
+        removed = self.results.invalidate_index(index_id)
+        if settings:
+            removed += self.embeddings.invalidate_index(index_id)
+            removed += self.embedders.invalidate_index(index_id)
+        logger.info(f"索引 '{index_id}' 缓存已失效 ({removed} 项)")
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self.invalidations += 1
+        self.results.clear()
+        self.embeddings.clear()
+        self.embedders.clear()
+        logger.info("搜索缓存已全部清空")
+
+    def apply_task(self, task: Any) -> None:
+        """根据一个成功的任务失效相关缓存"""
+        task_type = task.type
+        index_id = task.index_uid
+        if task_type in GLOBAL_TASK_TYPES:
+            self.clear()
+        elif task_type in SETTINGS_TASK_TYPES and index_id:
+            self.invalidate_index(index_id, settings=True)
+        elif task_type in DOCUMENT_TASK_TYPES and index_id:
+            self.invalidate_index(index_id)
+
+    def poll_tasks(self, client: "meilisearch.Client", force: bool = False) -> None:
+        """
+        距上次轮询超过 poll_interval 时读取上次之后完成的成功任务并失效缓存；
+        同一时间只有一个请求执行轮询，其余请求直接跳过
+        """
+        if not force and time.monotonic() - self._last_poll < self.poll_interval:
+            return
+        if not self._poll_lock.acquire(blocking=False):
+            return
+        try:
+            self._last_poll = time.monotonic()
+            parameters: Dict[str, Any] = {"statuses": ["succeeded"], "limit": TASK_POLL_LIMIT}
+            if self._last_finished_at is not None:
+                # SDK 的时间只有微秒精度，afterFinishedAt 会再次返回恰好在水位时刻完成的任务，按 uid 去重
+                parameters["afterFinishedAt"] = self._last_finished_at.strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+            res = client.get_tasks(parameters)
+            tasks = [task for task in res.results
+                     if task.finished_at is not None and task.uid not in self._last_finished_uids]
+            if not tasks:
+                return
+
+            if self._last_finished_at is not None:
+                if len(res.results) >= TASK_POLL_LIMIT:
+                    self.clear()
+                else:
+                    for task in sorted(tasks, key=lambda t: (_utc(t.finished_at), t.uid)):
+                        self.apply_task(task)
+
+            last = max(_utc(task.finished_at) for task in tasks)
+            if self._last_finished_at is None or last > self._last_finished_at:
+                self._last_finished_at = last
+                self._last_finished_uids = set()
+            self._last_finished_uids.update(
+                task.uid for task in tasks if _utc(task.finished_at) == self._last_finished_at
+            )
+        except Exception as e:
+            logger.warning(f"轮询 Meilisearch 任务失败: {str(e)}")
+        finally:
+            self._poll_lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存命中率与节省的上游调用次数"""
+        def cache_stats(cache: TTLCache) -> Dict[str, Any]:
+            total = cache.hits + cache.misses
+            return {
+                "size": len(cache),
+                "hits": cache.hits,
+                "misses": cache.misses,
+                "hit_rate": round(cache.hits / total, 4) if total else 0.0,
+            }
+
+        last_finished_at = self._last_finished_at
+        return {
+            "results": cache_stats(self.results),
+            "query_embeddings": cache_stats(self.embeddings),
+            "saved_upstream_calls": self.saved_upstream_calls,
+            "invalidations": self.invalidations,
+            "last_task_finished_at": last_finished_at.isoformat() + "Z" if last_finished_at else None,
+        }
@@ -0,0 +1,131 @@
+"""
+上游嵌入服务客户端模块
+封装 OpenAI 客户端及其连接池，负责启动预热，并记录在途请求数，
+热重载替换客户端时等在途请求结束后再关闭旧连接池
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    from .config import Config
+
+
+class UpstreamClient:
+    """上游 OpenAI 客户端及其 httpx 连接池"""
+
+    def __init__(self, api_key: str, base_url: str, timeout: float, max_connections: int,
+                 keepalive_expiry: float = 300.0):
+        import httpx
+        from openai import OpenAI
+
+        self.api_key = api_key
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        # 最近一次预热请求的连接数与成功数，由 /ready 报告
+        self.warmup_requested = 0
+        self.warmed = 0
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=keepalive_expiry
+            ),
+            timeout=timeout
+        )
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=timeout,
+            http_client=self.http_client
+        )
+        self._inflight = 0
+        self._retired = False
+        self._closed = False
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_config(cls, config: "Config") -> "UpstreamClient":
+        return cls(config.api_key, config.base_url, config.timeout, config.max_connections,
+                   config.keepalive_expiry)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def acquire(self) -> None:
+        """登记一个在途请求"""
+        with self._lock:
+            self._inflight += 1
+
+    def release(self) -> None:
+        """结束一个在途请求；已退役且没有在途请求时关闭连接池"""
+        with self._lock:
+            self._inflight -= 1
+            if self._retired and self._inflight == 0:
+                self.close()
+
+    def retire(self, drain_timeout: float) -> None:
+        """
+        标记为退役：没有在途请求时立即关闭，否则等最后一个请求结束后关闭，
+        超过 drain_timeout 秒仍未结束时强制关闭
+        """
+        with self._lock:
+            self._retired = True
+            if self._inflight == 0:
+                self.close()
+                return
+            logger.info(f"旧上游客户端还有 {self._inflight} 个在途请求，结束后关闭")
+
+        timer = threading.Timer(drain_timeout, self.close)
+        timer.daemon = True
+        timer.start()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            if self._inflight:
+                logger.warning(f"强制关闭上游客户端，仍有 {self._inflight} 个在途请求")
+        self.http_client.close()
+
+    def warmup(self, connections: int, timeout: float) -> int:
+        """
+        预先建立到上游的连接（含 TLS 握手）并放入连接池，返回成功预热的连接数
+        任意 HTTP 响应都说明连接已建立，因此不关心状态码
+        """
+        url = f"{self.base_url.rstrip('/')}/models"
+        headers = {"Authorization": f"Bearer {self.api_key}"}
+
+        def open_connection(_):
+            try:
+                self.http_client.get(url, headers=headers, timeout=timeout)
+                return True
+            except Exception as e:
+                logger.warning(f"上游连接预热失败: {str(e)}")
+                return False
+
+        count = min(connections, self.max_connections)
+        if count <= 0:
+            return 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=count) as executor:
+            warmed = sum(executor.map(open_connection, range(count)))
+        self.warmup_requested = count
+        self.warmed = warmed
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if warmed == 0:
+            logger.warning(f"上游连接预热全部失败: 0/{count} 个连接, 耗时 {elapsed_ms:.0f}ms")
+        else:
+            logger.info(f"上游连接预热完成: {warmed}/{count} 个连接, 耗时 {elapsed_ms:.0f}ms")
+        return warmed
@@ -0,0 +1,259 @@
+"""
+向量导出/导入模块
+从 Meilisearch 分批读取文档的 embedder 向量写入紧凑的磁盘格式，
+再按批作为用户提供的向量写回目标索引，重建索引时无需重新调用嵌入服务
+
+目录格式：
+  vectors.f32  小端 float32 原始数据，每行一个向量，可用 numpy.memmap(dtype="<f4") 直接映射
+  ids.jsonl    每行一个主键，与 vectors.f32 的行一一对应（多向量文档占多行）
+  meta.json    索引、embedder、主键字段、维度、行数等元信息，最后写入，存在即表示导出完整
+"""
+import json
+import os
+import sys
+from array import array
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from loguru import logger
+
+if TYPE_CHECKING:
+    import meilisearch
+
+VECTORS_FILE = "vectors.f32"
+IDS_FILE = "ids.jsonl"
+META_FILE = "meta.json"
+FORMAT_VERSION = 1
+# 查询导入任务状态时每次请求的任务 uid 数，避免查询字符串过长
+TASK_QUERY_CHUNK = 100
+
+_BIG_ENDIAN = sys.byteorder == "big"
+
+
+def _extract_embeddings(entry: Any) -> List[List[float]]:
+    """从文档 _vectors 中某个 embedder 的值里取出向量列表"""
+    if entry is None:
+        return []
+    embeddings = entry.get("embeddings") if isinstance(entry, dict) else entry
+    if not embeddings:
+        return []
+    if isinstance(embeddings[0], (int, float)):
+        return [embeddings]
+    return embeddings
+
+
+def _to_bytes(vector: List[float]) -> bytes:
+    """将向量编码为小端 float32"""
+    data = array("f", vector)
+    if _BIG_ENDIAN:
+        data.byteswap()
+    return data.tobytes()
+
+
+def read_meta(path: str) -> Dict[str, Any]:
+    """读取导出目录的元信息"""
+    meta_path = os.path.join(path, META_FILE)
+    if not os.path.exists(meta_path):
+        raise FileNotFoundError(f"{meta_path} 不存在，导出不完整或目录错误")
+    with open(meta_path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _check_row_counts(path: str, count: int, row_bytes: int) -> None:
+    """检查 vectors.f32 和 ids.jsonl 的行数与 meta.json 记录的一致，避免导入截断的导出"""
+    vectors_size = os.path.getsize(os.path.join(path, VECTORS_FILE))
+    if vectors_size != count * row_bytes:
+        raise ValueError(
+            f"{VECTORS_FILE} 大小 {vectors_size} 字节与 meta.json 中的 {count} 个向量不符，导出可能已损坏"
+        )
+    with open(os.path.join(path, IDS_FILE), "r", encoding="utf-8") as f:
+        ids = sum(1 for line in f if line.strip())
+    if ids != count:
+        raise ValueError(f"{IDS_FILE} 有 {ids} 行，与 meta.json 中的 {count} 个向量不符，导出可能已损坏")
+
+
+def _failed_tasks(client: "meilisearch.Client", task_uids: List[int]) -> List[Dict[str, Any]]:
+    """查询失败或被取消的导入任务，返回其 uid、状态和错误信息"""
+    failed = []
+    for start in range(0, len(task_uids), TASK_QUERY_CHUNK):
+        uids = task_uids[start:start + TASK_QUERY_CHUNK]
+        res = client.get_tasks({"uids": uids, "statuses": ["failed", "canceled"], "limit": len(uids)})
+        for task in res.results:
+            failed.append({"uid": task.uid, "status": task.status, "error": task.error})
+    return sorted(failed, key=lambda task: task["uid"])
+
+
+def export_vectors(client: "meilisearch.Client", index_id: str, embedder_name: str, output_dir: str,
+                   batch_size: int = 1000) -> Dict[str, Any]:
+    """
+    分批读取索引中所有文档的向量（retrieveVectors）并写入 output_dir，
+    内存占用只与 batch_size 有关
+    """
+    if batch_size <= 0:
+        raise ValueError(f"batch_size 必须大于 0: {batch_size}")
+    index = client.get_index(index_id)
+    primary_key = index.primary_key
+    if not primary_key:
+        raise ValueError(f"索引 '{index_id}' 没有主键，无法导出")
+
+    os.makedirs(output_dir, exist_ok=True)
+    meta_path = os.path.join(output_dir, META_FILE)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    vectors_tmp = os.path.join(output_dir, VECTORS_FILE + ".part")
+    ids_tmp = os.path.join(output_dir, IDS_FILE + ".part")
+
+    dimensions: Optional[int] = None
+    rows = 0
+    documents = 0
+    skipped = 0
+    offset = 0
+
+    logger.info(f"开始导出索引 '{index_id}' 的 embedder '{embedder_name}' 向量到 {output_dir}")
+    with open(vectors_tmp, "wb") as vf, open(ids_tmp, "w", encoding="utf-8") as idf:
+        while True:
+            page = index.get_documents({
+                "offset": offset,
+                "limit": batch_size,
+                "retrieveVectors": True,
+            })
+            if not page.results:
+                break
+
+            for document in page.results:
+                doc = dict(document)
+                documents += 1
+                embeddings = _extract_embeddings(doc.get("_vectors", {}).get(embedder_name))
+                if not embeddings:
+                    skipped += 1
+                    continue
+
+                doc_id = json.dumps(doc[primary_key], ensure_ascii=False)
+                for vector in embeddings:
+                    if dimensions is None:
+                        dimensions = len(vector)
+                    elif len(vector) != dimensions:
+                        raise ValueError(
+                            f"文档 {doc_id} 的向量维度 {len(vector)} 与之前的 {dimensions} 不一致"
+                        )
+                    vf.write(_to_bytes(vector))
+                    idf.write(doc_id + "\n")
+                    rows += 1
+
+            offset += len(page.results)
+            logger.info(f"已导出 {documents}/{page.total} 个文档, {rows} 个向量")
+            if len(page.results) < batch_size:
+                break
+
+    os.replace(vectors_tmp, os.path.join(output_dir, VECTORS_FILE))
+    os.replace(ids_tmp, os.path.join(output_dir, IDS_FILE))
+
+    meta = {
+        "format": FORMAT_VERSION,
+        "dtype": "<f4",
+        "index_uid": index_id,
+        "embedder": embedder_name,
+        "primary_key": primary_key,
+        "dimensions": dimensions or 0,
+        "count": rows,
+        "documents": documents - skipped,
+    }
+    with open(meta_path, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    if skipped:
+        logger.warning(f"{skipped} 个文档没有 embedder '{embedder_name}' 的向量，已跳过")
+    logger.info(f"导出完成: {meta['documents']} 个文档, {rows} 个向量, 维度 {dimensions}")
+    return {**meta, "skipped": skipped}
+
+
+def import_vectors(client: "meilisearch.Client", index_id: str, input_dir: str,
+                   embedder_name: Optional[str] = None, batch_size: int = 1000,
+                   wait: bool = False, wait_timeout: float = 3600.0) -> Dict[str, Any]:
+    """
+    分批读取导出目录，将向量作为用户提供的向量（regenerate: false）写回目标索引。
+    使用部分更新，不会覆盖文档的其他字段；目标索引需预先配置同名 embedder
+    """
+    if batch_size <= 0:
+        raise ValueError(f"batch_size 必须大于 0: {batch_size}")
+    meta = read_meta(input_dir)
+    if meta.get("format") != FORMAT_VERSION:
+        raise ValueError(f"不支持的导出格式版本: {meta.get('format')}")
+
+    embedder_name = embedder_name or meta["embedder"]
+    primary_key = meta["primary_key"]
+    dimensions = meta["dimensions"]
+    row_bytes = dimensions * 4
+    _check_row_counts(input_dir, meta["count"], row_bytes)
+    index = client.index(index_id)
+
+    task_uids: List[int] = []
+    documents: List[Dict[str, Any]] = []
+    imported = 0
+    rows = 0
+
+    def flush() -> None:
+        nonlocal imported
+        task_info = index.update_documents(documents, primary_key)
+        task_uids.append(task_info.task_uid)
+        imported += len(documents)
+        logger.info(f"已提交 {imported} 个文档 (任务 {task_info.task_uid})")
+        documents.clear()
+
+    logger.info(f"开始导入 {input_dir} 的 {meta['count']} 个向量到索引 '{index_id}' 的 embedder '{embedder_name}'")
+    with open(os.path.join(input_dir, VECTORS_FILE), "rb") as vf, \
+            open(os.path.join(input_dir, IDS_FILE), "r", encoding="utf-8") as idf:
+        while dimensions:
+            chunk = vf.read(row_bytes * batch_size)
+            if not chunk:
+                break
+            values = array("f")
+            values.frombytes(chunk)
+            if _BIG_ENDIAN:
+                values.byteswap()
+
+            for start in range(0, len(values), dimensions):
+                doc_id = json.loads(idf.readline())
+                vector = values[start:start + dimensions].tolist()
+                rows += 1
+                # 同一文档的多个向量在导出时相邻存放
+                if documents and documents[-1][primary_key] == doc_id:
+                    documents[-1]["_vectors"][embedder_name]["embeddings"].append(vector)
+                    continue
+                if len(documents) >= batch_size:
+                    flush()
+                documents.append({
+                    primary_key: doc_id,
+                    "_vectors": {
+                        embedder_name: {
+                            "embeddings": [vector],
+                            "regenerate": False,
+                        }
+                    },
+                })
+
+    if documents:
+        flush()
+
+    result = {
+        "index_uid": index_id,
+        "embedder": embedder_name,
+        "documents": imported,
+        "vectors": rows,
+        "task_uids": task_uids,
+    }
+
+    if wait and task_uids:
+        # 同一索引的文档任务按顺序执行，最后一个结束时之前的任务也都已结束；
+        # 前面的批次失败不会阻止后续批次，因此需要检查每个任务的状态
+        client.wait_for_task(task_uids[-1], timeout_in_ms=int(wait_timeout * 1000), interval_in_ms=1000)
+        failed = _failed_tasks(client, task_uids)
+        result["status"] = "failed" if failed else "succeeded"
+        result["failed_tasks"] = failed
+        if failed:
+            logger.error(f"{len(failed)}/{len(task_uids)} 个导入任务未成功: {[task['uid'] for task in failed]}")
+        else:
+            logger.info(f"全部 {len(task_uids)} 个导入任务已成功")
+
+    logger.info(f"导入完成: {imported} 个文档, {rows} 个向量, {len(task_uids)} 个任务")
+    return result
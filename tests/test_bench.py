@@ -0,0 +1,89 @@
+"""
+流量采样与基准测试工具的单元测试
+"""
+import json
+import pytest
+from fastapi.testclient import TestClient
+from meilisearch_embedding_proxy.capture import TrafficRecorder, load_capture
+from meilisearch_embedding_proxy.bench import (
+    build_payloads,
+    create_fake_upstream,
+    percentile,
+    run_benchmark,
+    synthetic_workload,
+)
+
+def test_recorder_roundtrip(tmp_path):
+    """测试采样记录写入后可以按时间顺序读回"""
+    path = tmp_path / "capture.jsonl"
+    recorder = TrafficRecorder(str(path), sample_rate=1.0, include_text=True)
+    recorder.record(["hello", "世界"])
+    recorder.record(["query"])
+    recorder.close()
+
+    entries = load_capture(str(path))
+    assert len(entries) == 2
+    assert entries[0]["batch_size"] == 2
+    assert entries[0]["lengths"] == [5, 2]
+    assert entries[0]["input"] == ["hello", "世界"]
+    assert entries[0]["ts"] <= entries[1]["ts"]
+
+def test_recorder_without_text(tmp_path):
+    """测试默认不记录原始文本，采样率为 0 时不写入"""
+    path = tmp_path / "capture.jsonl"
+    recorder = TrafficRecorder(str(path), sample_rate=1.0)
+    recorder.record(["secret text"])
+    recorder.close()
+    entry = json.loads(path.read_text(encoding="utf-8"))
+    assert "input" not in entry
+    assert entry["lengths"] == [11]
+
+    empty_path = tmp_path / "empty.jsonl"
+    recorder = TrafficRecorder(str(empty_path), sample_rate=0.0)
+    recorder.record(["ignored"])
+    recorder.close()
+    assert load_capture(str(empty_path)) == []
+
+def test_synthetic_workload_and_payloads():
+    """测试合成负载可复现，且生成的文本长度与记录一致"""
+    entries = synthetic_workload(50, batch_size=8, query_ratio=0.5, seed=1)
+    assert entries == synthetic_workload(50, batch_size=8, query_ratio=0.5, seed=1)
+    assert all(entry["batch_size"] in (1, 8) for entry in entries)
+
+    payloads = build_payloads(entries, seed=1)
+    assert len(payloads) == 50
+    for entry, (offset, texts) in zip(entries, payloads):
+        assert offset == 0.0
+        assert [len(text) for text in texts] == entry["lengths"]
+
+def test_percentile():
+    """测试最近秩分位数"""
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 50) == 0.0
+
+def test_fake_upstream():
+    """测试假上游返回 OpenAI 兼容格式并统计调用次数"""
+    fake_client = TestClient(create_fake_upstream(latency_ms=0, per_item_ms=0, jitter_ms=0))
+    response = fake_client.post("/v1/embeddings", json={"input": ["a", "b"], "dimensions": 8})
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["data"]) == 2
+    assert len(data["data"][0]["embedding"]) == 8
+    assert [item["index"] for item in data["data"]] == [0, 1]
+    assert data["usage"]["prompt_tokens"] == 2
+
+    again = fake_client.post("/v1/embeddings", json={"input": ["c", "d"], "dimensions": 8, "model": "m"}).json()
+    assert again["data"] == data["data"]
+    assert again["model"] == "m"
+
+    stats = fake_client.get("/stats").json()
+    assert stats["calls"] == 2
+    assert stats["items"] == 4
+
+def test_benchmark_rejects_zero_concurrency():
+    """测试并发度为 0 时直接报错，而不是启动服务后永久阻塞"""
+    with pytest.raises(ValueError):
+        run_benchmark(num_requests=1, concurrency=0)
@@ -0,0 +1,76 @@
+"""
+输入归一化测试
+"""
+import time
+from meilisearch_embedding_proxy.normalize import TextNormalizer
+from meilisearch_embedding_proxy.bench import run_normalize_benchmark
+
+def test_strip_markup_and_entities():
+    """测试去除 HTML 标签、注释、脚本并解码实体"""
+    normalizer = TextNormalizer()
+    text = "<div><!-- nav --><script>var a = 1;</script><p>Tom&nbsp;&amp;&nbsp;Jerry</p></div>"
+    assert normalizer.normalize(text) == "Tom & Jerry"
+
+def test_markup_keeps_comparisons():
+    """测试比较表达式中的尖括号不会被当作标签删除"""
+    normalizer = TextNormalizer()
+    assert normalizer.normalize("if a<b and c>d then") == "if a<b and c>d then"
+    assert normalizer.normalize('x<span class="k">1</span><br/>y') == "x 1 y"
+
+def test_unclosed_blocks_are_linear():
+    """测试未闭合的注释和 script 不会导致平方耗时（此前 120KB 的 "<!--" 需要约 25 秒）"""
+    normalizer = TextNormalizer()
+    for text in ["<!--" * 30000, "<script>" * 15000, "<style " * 15000]:
+        start = time.perf_counter()
+        normalizer.normalize(text)
+        assert time.perf_counter() - start < 1.0
+    assert normalizer.normalize("a <!-- open <p>b</p>") == "a <!-- open b"
+
+def test_unicode_and_whitespace():
+    """测试 NFKC、零宽字符和空白合并"""
+    normalizer = TextNormalizer()
+    text = "  ＩＤ：１２３\u200b  \t向量\u3000搜索 \n\n\n 第二行  "
+    assert normalizer.normalize(text) == "ID:123 向量 搜索\n第二行"
+
+def test_keeps_joiners():
+    """测试保留 ZWNJ 和 ZWJ：波斯语词形和 emoji 组合序列依赖它们"""
+    normalizer = TextNormalizer()
+    persian = "\u0645\u06cc\u200c\u062e\u0648\u0627\u0647\u0645"
+    family = "\U0001f468\u200d\U0001f469\u200d\U0001f467"
+    assert normalizer.normalize(persian) == persian
+    assert normalizer.normalize(family + "\u200b") == family
+
+def test_max_repeat_keeps_digits_and_letters():
+    """测试重复截断不改变数字、字母和汉字"""
+    normalizer = TextNormalizer(max_repeat=3)
+    assert normalizer.normalize("price: 1000000 yuan") == "price: 1000000 yuan"
+    assert normalizer.normalize("id 20000 zzzzz 哈哈哈哈哈!!!!!!") == "id 20000 zzzzz 哈哈哈哈哈!!!"
+
+def test_max_repeat():
+    """测试重复字符和重复样板行的截断"""
+    normalizer = TextNormalizer(max_repeat=2)
+    text = "title----------\n查看更多\n正文\n查看更多\n查看更多"
+    assert normalizer.normalize(text) == "title--\n查看更多\n正文\n查看更多"
+
+def test_disabled_steps_keep_text():
+    """测试关闭所有步骤时文本不变"""
+    normalizer = TextNormalizer(nfkc=False, strip_markup=False, collapse_whitespace=False)
+    text = "<b>ＩＤ</b>  "
+    assert normalizer.normalize(text) == text
+
+def test_batch_stats():
+    """测试批量归一化的统计，以及结果为空时保留原文"""
+    normalizer = TextNormalizer()
+    result = normalizer.normalize_batch(["<br>", "a   b"])
+    assert result == ["<br>", "a b"]
+    normalizer.record_usage(chars_sent=100, prompt_tokens=50)
+    stats = normalizer.stats()
+    assert stats["texts"] == 2
+    assert stats["chars_removed"] == 2
+    assert stats["estimated_tokens_removed"] == 1
+
+def test_normalize_benchmark():
+    """测试归一化基准可以运行并移除噪声"""
+    report = run_normalize_benchmark(num_batches=5, batch_size=20)
+    assert report["texts"] == 100
+    assert report["removed_ratio"] > 0
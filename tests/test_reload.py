@@ -0,0 +1,120 @@
+"""
+配置热重载测试
+"""
+import pytest
+from fastapi.testclient import TestClient
+from meilisearch_embedding_proxy import config as config_module
+from meilisearch_embedding_proxy import fastapi_server
+from meilisearch_embedding_proxy.config import get_config, reload_config
+from meilisearch_embedding_proxy.upstream import UpstreamClient
+
+@pytest.fixture
+def restore_config(monkeypatch):
+    """测试结束后恢复全局配置和上游客户端"""
+    original = get_config()
+    monkeypatch.setenv("API_KEY", "test-key")
+    yield
+    config_module._config = original
+    fastapi_server.close_clients()
+
+def test_reload_reports_changed_fields(restore_config, monkeypatch):
+    """测试重新加载后替换全局配置并返回变更项"""
+    reload_config()
+    monkeypatch.setenv("TIMEOUT", "45")
+    old, new, changed = reload_config()
+    assert get_config() is new
+    assert new.timeout == 45
+    assert changed == ["timeout"]
+
+def test_reload_keeps_old_config_when_invalid(restore_config, monkeypatch):
+    """测试配置无效时保留旧配置"""
+    before = get_config()
+    monkeypatch.setenv("TIMEOUT", "not-a-number")
+    with pytest.raises(ValueError):
+        reload_config()
+    assert get_config() is before
+
+def test_invalid_dotenv_does_not_leak_into_environ(restore_config, monkeypatch, tmp_path):
+    """测试 .env 无效时不修改进程环境变量"""
+    import os
+
+    monkeypatch.delenv("TIMEOUT", raising=False)
+    dotenv_file = tmp_path / ".env"
+    dotenv_file.write_text("TIMEOUT=not-a-number\n")
+    monkeypatch.setattr(config_module, "_dotenv_path", str(dotenv_file))
+    monkeypatch.setattr(config_module, "_dotenv_keys", set())
+
+    before = get_config()
+    with pytest.raises(ValueError):
+        reload_config()
+    assert get_config() is before
+    assert "TIMEOUT" not in os.environ
+
+    dotenv_file.write_text("TIMEOUT=45\n")
+    _, new, _ = reload_config()
+    assert new.timeout == 45
+    assert os.environ["TIMEOUT"] == "45"
+    monkeypatch.delenv("TIMEOUT")
+
+def test_invalid_log_level_rejected_before_swap(restore_config, monkeypatch):
+    """测试 LOG_LEVEL 无效时在替换配置前拒绝，其他新值也不生效"""
+    before = get_config()
+    monkeypatch.setenv("TIMEOUT", "12")
+    monkeypatch.setenv("LOG_LEVEL", "VERBOSE")
+    with pytest.raises(ValueError, match="LOG_LEVEL"):
+        fastapi_server.reload_components()
+    assert get_config() is before
+    assert get_config().timeout != 12
+
+def test_setup_logging_keeps_old_sink_on_error(capsys):
+    """测试日志级别无效时保留原有输出"""
+    from loguru import logger
+
+    try:
+        config_module.setup_logging("INFO")
+        with pytest.raises(ValueError):
+            config_module.setup_logging("VERBOSE")
+        logger.info("still logging")
+        assert "still logging" in capsys.readouterr().out
+    finally:
+        logger.remove(config_module._log_handler_id)
+        config_module._log_handler_id = None
+
+def test_retired_upstream_closes_after_inflight():
+    """测试退役的上游客户端在在途请求结束后才关闭"""
+    upstream = UpstreamClient("key", "http://127.0.0.1:9/v1", timeout=1, max_connections=2)
+    upstream.acquire()
+    upstream.retire(drain_timeout=60)
+    assert not upstream.closed
+    upstream.release()
+    assert upstream.closed
+
+def test_reload_swaps_only_changed_upstream(restore_config, monkeypatch):
+    """测试上游配置变化时替换客户端，无关配置变化时保持不变"""
+    monkeypatch.setenv("WARMUP_CONNECTIONS", "0")
+    reload_config()
+    with fastapi_server.upstream_client() as client:
+        assert client is not None
+    first = fastapi_server._upstream
+
+    monkeypatch.setenv("SEARCH_CACHE_TTL", "30")
+    result = fastapi_server.reload_components()
+    assert "upstream" not in result["rebuilt"]
+    assert fastapi_server._upstream is first
+
+    monkeypatch.setenv("BASE_URL", "http://127.0.0.1:9/v1")
+    result = fastapi_server.reload_components()
+    assert "upstream" in result["rebuilt"]
+    assert fastapi_server._upstream is not first
+    assert first.closed
+
+def test_reload_endpoint(restore_config, monkeypatch):
+    """测试管理接口触发重新加载，配置无效时返回 400"""
+    test_client = TestClient(fastapi_server.create_app(configure_logging=False))
+    response = test_client.post("/v1/admin/reload")
+    assert response.status_code == 200
+    assert response.json()["success"] is True
+
+    monkeypatch.setenv("PORT", "oops")
+    response = test_client.post("/v1/admin/reload")
+    assert response.status_code == 400
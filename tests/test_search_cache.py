@@ -0,0 +1,200 @@
+"""
+搜索缓存测试：LRU/TTL 行为与基于任务的失效
+"""
+import time
+import pytest
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from meilisearch_embedding_proxy.search_cache import SearchCache, TTLCache
+
+_EPOCH = datetime(2024, 1, 1)
+
+def _task(uid, task_type, index_uid, finished=None):
+    """finished 为完成时间相对基准的秒数，默认与 uid 相同"""
+    finished_at = _EPOCH + timedelta(seconds=uid if finished is None else finished)
+    return SimpleNamespace(uid=uid, type=task_type, index_uid=index_uid, status="succeeded",
+                           finished_at=finished_at)
+
+class FakeClient:
+    def __init__(self):
+        self.tasks = []
+
+    def get_tasks(self, parameters):
+        assert parameters["statuses"] == ["succeeded"]
+        tasks = self.tasks
+        if "afterFinishedAt" in parameters:
+            after = datetime.strptime(parameters["afterFinishedAt"], "%Y-%m-%dT%H:%M:%S.%fZ")
+            # 真实时间为纳秒精度，按微秒截断后的水位会再次返回恰好在该时刻完成的任务
+            tasks = [task for task in tasks if task.finished_at >= after]
+        results = sorted(tasks, key=lambda t: t.uid, reverse=True)[:parameters["limit"]]
+        return SimpleNamespace(results=results)
+
+def test_ttl_cache_lru_and_expiry():
+    """测试容量淘汰最久未使用的键，过期键视为未命中"""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(("a", 1), "x")
+    cache.set(("a", 2), "y")
+    assert cache.get(("a", 1)) == "x"
+    cache.set(("b", 1), "z")
+    assert cache.get(("a", 2)) is None
+    assert cache.get(("a", 1)) == "x"
+    assert cache.hits == 2
+    assert cache.misses == 1
+
+    short = TTLCache(maxsize=10, ttl=0.01)
+    short.set(("a",), "x")
+    time.sleep(0.02)
+    assert short.get(("a",)) is None
+
+def test_document_task_invalidates_results_only():
+    """测试文档任务只失效该索引的搜索结果"""
+    client = FakeClient()
+    client.tasks.append(_task(1, "indexCreation", "movies"))
+    cache = SearchCache(poll_interval=0)
+    cache.poll_tasks(client)
+
+    cache.results.set(("movies", "q1"), {"hits": []})
+    cache.results.set(("books", "q1"), {"hits": []})
+    cache.embeddings.set(("movies", "default", "q1"), [0.1])
+
+    client.tasks.append(_task(2, "documentAdditionOrUpdate", "movies"))
+    cache.poll_tasks(client)
+
+    assert cache.results.get(("movies", "q1")) is None
+    assert cache.results.get(("books", "q1")) is not None
+    assert cache.embeddings.get(("movies", "default", "q1")) == [0.1]
+    assert cache.stats()["last_task_finished_at"] == "2024-01-01T00:00:02Z"
+
+def test_settings_task_invalidates_embeddings():
+    """测试设置任务同时失效查询向量，且旧任务不会重复处理"""
+    client = FakeClient()
+    client.tasks.append(_task(5, "settingsUpdate", "movies"))
+    cache = SearchCache(poll_interval=0)
+    cache.poll_tasks(client)
+
+    cache.embeddings.set(("movies", "default", "q1"), [0.1])
+    cache.poll_tasks(client)
+    assert cache.embeddings.get(("movies", "default", "q1")) == [0.1]
+
+    client.tasks.append(_task(6, "settingsUpdate", "movies"))
+    cache.poll_tasks(client)
+    assert cache.embeddings.get(("movies", "default", "q1")) is None
+
+def test_out_of_order_task_completion():
+    """测试 uid 较小但较晚完成的任务仍会失效缓存（优先执行的任务 uid 更大却先完成）"""
+    client = FakeClient()
+    client.tasks.append(_task(1, "indexCreation", "movies"))
+    cache = SearchCache(poll_interval=0)
+    cache.poll_tasks(client)
+
+    client.tasks.append(_task(10, "taskCancelation", None, finished=5))
+    cache.poll_tasks(client)
+
+    cache.results.set(("movies", "q1"), {"hits": []})
+    client.tasks.append(_task(9, "documentAdditionOrUpdate", "movies", finished=8))
+    cache.poll_tasks(client)
+    assert cache.results.get(("movies", "q1")) is None
+
+def test_store_skips_results_after_invalidation():
+    """测试查询期间索引被失效时不写入可能过期的结果"""
+    cache = SearchCache()
+    generation = cache.generation("movies")
+    cache.invalidate_index("movies")
+    assert not cache.store(cache.results, ("movies", "q1"), {"hits": []}, generation)
+    assert cache.results.get(("movies", "q1")) is None
+
+    generation = cache.generation("movies")
+    cache.invalidate_index("books")
+    assert cache.store(cache.results, ("movies", "q1"), {"hits": []}, generation)
+
+    generation = cache.generation("movies")
+    cache.clear()
+    assert not cache.store(cache.results, ("movies", "q2"), {"hits": []}, generation)
+
+def test_stats_hit_rate():
+    """测试命中率统计"""
+    cache = SearchCache()
+    cache.results.set(("movies", "q"), {"hits": []})
+    cache.results.get(("movies", "q"))
+    cache.results.get(("movies", "other"))
+    stats = cache.stats()
+    assert stats["results"]["hit_rate"] == 0.5
+    assert stats["saved_upstream_calls"] == 0
+    cache.record_saved_upstream_call()
+    assert cache.stats()["saved_upstream_calls"] == 1
+
+class FakeSearchIndex:
+    def __init__(self, embedder_url):
+        self.embedder_url = embedder_url
+        self.searches = []
+
+    def get_embedders(self):
+        return SimpleNamespace(embedders={"default": {"source": "rest", "url": self.embedder_url}})
+
+    def search(self, query, params):
+        self.searches.append((query, params))
+        return {"hits": [], "query": query}
+
+class FakeSearchClient(FakeClient):
+    def __init__(self, index):
+        super().__init__()
+        self._index = index
+
+    def index(self, index_id):
+        return self._index
+
+@pytest.fixture
+def search_app(monkeypatch):
+    """使用假 Meilisearch 客户端和假上游的搜索代理"""
+    from fastapi.testclient import TestClient
+    from meilisearch_embedding_proxy import fastapi_server
+    from meilisearch_embedding_proxy.config import get_config
+
+    index = FakeSearchIndex(f"{get_config().service_url}/v1/embeddings")
+    upstream_calls = []
+
+    def fake_request_embeddings(inputs):
+        upstream_calls.append(inputs)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[0.5, 0.25])])
+
+    monkeypatch.setattr(fastapi_server, "_search_cache", None)
+    monkeypatch.setattr(fastapi_server, "get_meilisearch_client", lambda: FakeSearchClient(index))
+    monkeypatch.setattr(fastapi_server, "request_embeddings", fake_request_embeddings)
+    test_client = TestClient(fastapi_server.create_app(configure_logging=False))
+    return test_client, index, upstream_calls
+
+def test_search_endpoint_injects_vector_and_caches(search_app):
+    """测试混合搜索由代理注入查询向量，重复查询命中缓存且不调用上游"""
+    test_client, index, upstream_calls = search_app
+    body = {"q": "向量搜索", "hybrid": {"embedder": "default", "semanticRatio": 0.5}}
+
+    response = test_client.post("/v1/meilisearch/indexes/movies/search", json=body)
+    assert response.status_code == 200
+    assert response.json()["query"] == "向量搜索"
+    assert index.searches[0][1]["vector"] == [0.5, 0.25]
+    assert "q" not in index.searches[0][1]
+    assert len(upstream_calls) == 1
+
+    response = test_client.post("/v1/meilisearch/indexes/movies/search", json=body)
+    assert response.status_code == 200
+    assert len(index.searches) == 1
+    assert len(upstream_calls) == 1
+
+    other = {"q": "向量搜索", "hybrid": {"embedder": "default"}, "limit": 5}
+    response = test_client.post("/v1/meilisearch/indexes/movies/search", json=other)
+    assert response.status_code == 200
+    assert len(index.searches) == 2
+    assert len(upstream_calls) == 1
+
+    stats = test_client.get("/v1/meilisearch/search/stats").json()["stats"]
+    assert stats["saved_upstream_calls"] == 2
+    assert stats["results"]["hits"] == 1
+
+def test_search_endpoint_rejects_invalid_body(search_app):
+    """测试 hybrid 不是对象或 q 不是字符串时返回 400"""
+    test_client, index, _ = search_app
+    response = test_client.post("/v1/meilisearch/indexes/movies/search", json={"q": "a", "hybrid": "x"})
+    assert response.status_code == 400
+    response = test_client.post("/v1/meilisearch/indexes/movies/search", json={"q": 1})
+    assert response.status_code == 400
+    assert index.searches == []
@@ -0,0 +1,84 @@
+"""
+启动性能测试：导入耗时预算与延迟导入检查
+"""
+import subprocess
+import sys
+from fastapi.testclient import TestClient
+from meilisearch_embedding_proxy.fastapi_server import create_app
+
+# 导入 fastapi_server 时本项目自身的耗时预算（微秒），不含 FastAPI/pydantic 和 loguru；
+# 重新在导入时加载 openai/meilisearch/dotenv 会远超此预算
+OWN_IMPORT_TIME_BUDGET_US = 150_000
+
+# 导入时必然加载的第三方依赖，其耗时不计入预算
+EAGER_DEPENDENCIES = ["fastapi", "loguru"]
+
+# 仅在处理请求或启动预热时才需要的依赖，不应在导入时加载
+LAZY_MODULES = ["openai", "meilisearch", "dotenv", "uvicorn"]
+
+def _import_times(module: str) -> dict:
+    """使用 python -X importtime 获取各模块的累计导入耗时（微秒）"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            cumulative = int(parts[1])
+        except ValueError:
+            continue
+        times[parts[2].strip()] = cumulative
+    return times
+
+def test_server_import_is_lazy():
+    """测试导入服务模块时不加载上游 SDK 和 Meilisearch SDK"""
+    times = _import_times("meilisearch_embedding_proxy.fastapi_server")
+    for name in LAZY_MODULES:
+        assert name not in times, f"{name} 不应在导入时加载"
+
+def test_server_import_time_budget():
+    """测试服务模块扣除必需依赖后的导入耗时在预算内"""
+    times = _import_times("meilisearch_embedding_proxy.fastapi_server")
+    own = times["meilisearch_embedding_proxy.fastapi_server"]
+    own -= sum(times.get(name, 0) for name in EAGER_DEPENDENCIES)
+    assert own < OWN_IMPORT_TIME_BUDGET_US, f"导入耗时 {own}us 超出预算"
+
+def test_cli_import_is_lazy():
+    """测试导入命令行模块时不加载 Web 框架"""
+    times = _import_times("meilisearch_embedding_proxy.cli")
+    for name in LAZY_MODULES + ["fastapi"]:
+        assert name not in times, f"{name} 不应在导入时加载"
+
+def test_ready_after_startup(monkeypatch):
+    """测试就绪检查在应用启动后返回 200"""
+    from meilisearch_embedding_proxy.config import get_config
+
+    monkeypatch.setattr(get_config(), "warmup_connections", 0)
+    app = create_app(configure_logging=False)
+    with TestClient(app) as test_client:
+        response = test_client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+        assert response.json()["upstream_connections"] == {"warmed": 0, "requested": 0}
+
+def test_warmup_reports_failed_connections():
+    """测试上游不可达时预热返回 0 并记录请求的连接数，连接保留时间来自配置"""
+    from meilisearch_embedding_proxy.upstream import UpstreamClient
+
+    upstream = UpstreamClient("key", "http://127.0.0.1:9/v1", timeout=1, max_connections=2,
+                              keepalive_expiry=120)
+    try:
+        assert upstream.warmup(connections=4, timeout=1) == 0
+        assert upstream.warmup_requested == 2
+        assert upstream.warmed == 0
+        assert upstream.keepalive_expiry == 120
+    finally:
+        upstream.close()
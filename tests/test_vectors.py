@@ -0,0 +1,132 @@
+"""
+向量导出/导入测试，使用内存中的假 Meilisearch 客户端
+"""
+import copy
+import json
+import pytest
+from types import SimpleNamespace
+from meilisearch_embedding_proxy.vectors import export_vectors, import_vectors, read_meta
+
+class FakeIndex:
+    def __init__(self, documents, primary_key="id"):
+        self.primary_key = primary_key
+        self.documents = documents
+        self.updates = []
+
+    def get_documents(self, parameters):
+        assert parameters["retrieveVectors"] is True
+        offset, limit = parameters["offset"], parameters["limit"]
+        return SimpleNamespace(
+            results=self.documents[offset:offset + limit],
+            total=len(self.documents),
+        )
+
+    def update_documents(self, documents, primary_key):
+        self.updates.append((copy.deepcopy(documents), primary_key))
+        return SimpleNamespace(task_uid=len(self.updates))
+
+class FakeClient:
+    def __init__(self, index, statuses=None):
+        self._index = index
+        # 任务 uid -> 状态，未列出的任务视为成功
+        self.statuses = statuses or {}
+
+    def get_index(self, index_id):
+        return self._index
+
+    def index(self, index_id):
+        return self._index
+
+    def wait_for_task(self, uid, timeout_in_ms, interval_in_ms):
+        return SimpleNamespace(status=self.statuses.get(uid, "succeeded"))
+
+    def get_tasks(self, parameters):
+        results = [
+            SimpleNamespace(uid=uid, status=self.statuses.get(uid, "succeeded"), error={"code": "invalid"})
+            for uid in parameters["uids"]
+            if self.statuses.get(uid, "succeeded") in parameters["statuses"]
+        ]
+        return SimpleNamespace(results=results)
+
+def _documents():
+    return [
+        {"id": 1, "title": "a", "_vectors": {"default": {"embeddings": [[0.5, 1.0, -2.0]], "regenerate": True}}},
+        {"id": "two", "title": "b", "_vectors": {"default": {"embeddings": [[1.5, 0.0, 3.0], [0.0, 0.25, 1.0]]}}},
+        {"id": 3, "title": "c", "_vectors": {}},
+        {"id": 4, "title": "d", "_vectors": {"default": [2.0, 2.0, 2.0]}},
+    ]
+
+def test_export_vectors(tmp_path):
+    """测试导出的行数、主键与元信息"""
+    client = FakeClient(FakeIndex(_documents()))
+    result = export_vectors(client, "movies", "default", str(tmp_path), batch_size=2)
+
+    assert result["count"] == 4
+    assert result["documents"] == 3
+    assert result["skipped"] == 1
+
+    meta = read_meta(str(tmp_path))
+    assert meta["dimensions"] == 3
+    assert meta["primary_key"] == "id"
+    assert (tmp_path / "vectors.f32").stat().st_size == 4 * 3 * 4
+
+    ids = [json.loads(line) for line in (tmp_path / "ids.jsonl").read_text().splitlines()]
+    assert ids == [1, "two", "two", 4]
+
+def test_import_roundtrip(tmp_path):
+    """测试导入时按文档合并多个向量并设置 regenerate: false"""
+    export_vectors(FakeClient(FakeIndex(_documents())), "movies", "default", str(tmp_path))
+
+    target = FakeIndex([])
+    result = import_vectors(FakeClient(target), "movies_v2", str(tmp_path), batch_size=2, wait=True)
+
+    assert result["documents"] == 3
+    assert result["vectors"] == 4
+    assert result["task_uids"] == [1, 2]
+    assert result["status"] == "succeeded"
+    assert result["failed_tasks"] == []
+
+    documents = [doc for batch, _ in target.updates for doc in batch]
+    assert [doc["id"] for doc in documents] == [1, "two", 4]
+    two = documents[1]["_vectors"]["default"]
+    assert two["regenerate"] is False
+    assert two["embeddings"] == [[1.5, 0.0, 3.0], [0.0, 0.25, 1.0]]
+    assert all(primary_key == "id" for _, primary_key in target.updates)
+
+def test_rejects_invalid_batch_size(tmp_path):
+    """测试 batch_size 不大于 0 时拒绝导出和导入"""
+    client = FakeClient(FakeIndex(_documents()))
+    with pytest.raises(ValueError):
+        export_vectors(client, "movies", "default", str(tmp_path), batch_size=0)
+    export_vectors(client, "movies", "default", str(tmp_path))
+    with pytest.raises(ValueError):
+        import_vectors(client, "movies_v2", str(tmp_path), batch_size=0)
+
+def test_import_rejects_truncated_export(tmp_path):
+    """测试 ids.jsonl 或 vectors.f32 行数与元信息不一致时拒绝导入"""
+    export_vectors(FakeClient(FakeIndex(_documents())), "movies", "default", str(tmp_path))
+    ids_path = tmp_path / "ids.jsonl"
+    ids = ids_path.read_text()
+    ids_path.write_text("".join(ids.splitlines(keepends=True)[:-1]))
+
+    target = FakeIndex([])
+    with pytest.raises(ValueError, match="ids.jsonl"):
+        import_vectors(FakeClient(target), "movies_v2", str(tmp_path))
+    assert target.updates == []
+
+    ids_path.write_text(ids)
+    vectors_path = tmp_path / "vectors.f32"
+    vectors_path.write_bytes(vectors_path.read_bytes()[:-4])
+    with pytest.raises(ValueError, match="vectors.f32"):
+        import_vectors(FakeClient(target), "movies_v2", str(tmp_path))
+
+def test_import_reports_failed_middle_batch(tmp_path):
+    """测试中间批次失败而最后一个批次成功时，仍报告导入失败"""
+    export_vectors(FakeClient(FakeIndex(_documents())), "movies", "default", str(tmp_path))
+
+    client = FakeClient(FakeIndex([]), statuses={2: "failed"})
+    result = import_vectors(client, "movies_v2", str(tmp_path), batch_size=1, wait=True)
+
+    assert result["task_uids"] == [1, 2, 3]
+    assert result["status"] == "failed"
+    assert [task["uid"] for task in result["failed_tasks"]] == [2]